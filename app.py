@@ -2,72 +2,284 @@
 Flask web application for the AI-Powered Personalized Healthcare Assistant
 """
 
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
-from flask_cors import CORS
-import traceback
+from flask import Flask, Response, render_template, request, flash, redirect, url_for
+from cachetools import LFUCache
+import asyncio
+import contextlib
+import hashlib
+import logging
+import operator
+import orjson
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from healthcare_assistant import PersonalizedHealthcareAssistant
+from ml_engine import FEATURE_NAMES, patients_to_matrix
 from sample_data import create_sample_patients
-from models import Patient, VitalSigns, LabResults, MedicalHistory, Gender
+from models import Patient, VitalSigns, LabResults, MedicalHistory, Gender, WellnessPlan
 from config import get_config
 from database import PatientDatabase
 
+logger = logging.getLogger(__name__)
+
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = 'healthcare_assistant_secret_key_2024'
-CORS(app)
+
+# Static CORS headers (wildcard origin), applied to every response from a known route
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type'
+}
+
+@app.after_request
+def _add_cors_headers(response):
+    # Unknown paths get no CORS headers; known routes advertise only their own methods
+    rule = request.url_rule
+    if rule is not None:
+        response.headers.update(CORS_HEADERS)
+        response.headers['Access-Control-Allow-Methods'] = ','.join(sorted(rule.methods))
+    return response
 
 # Global assistant and database instances
 assistant = None
 db = None
 
+# Encoded /api/clusters payload, built once after training
+_CLUSTERS_JSON = None
+
+# Lazy per-worker initialization state
+_INITIALIZED = False
+_INIT_LOCK = threading.Lock()
+# After a failed initialization, requests fail fast for this many seconds
+# instead of each retrying the database setup and training
+INIT_RETRY_SECONDS = 30
+_INIT_FAILED_AT = None
+
+# Process that opened the global database; workers forked from a preloaded
+# master open their own on first request
+_DB_PID = None
+_DB_LOCK = threading.Lock()
+
+# Fitted models are shared between workers through snapshots in a private
+# per-user directory under this root, in shared memory where available
+SNAPSHOT_ROOT = os.getenv('MODEL_SNAPSHOT_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+
+# Bounded pool for CPU-bound inference and blocking DB calls made from async views
+EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+async def run_blocking(func, *args):
+    """Run a blocking call on the shared executor without stalling the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(EXECUTOR, func, *args)
+
+def ojsonify(obj, status=200):
+    """Encode a JSON response with orjson instead of Flask's stdlib encoder"""
+    return Response(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY),
+                    status=status, mimetype='application/json')
+
+# Serialized analysis results and report sections, keyed by a hash of the patient's clinical data
+_PLAN_CACHE = LFUCache(maxsize=512)
+_PLAN_LOCK = threading.Lock()
+
+def _plan_cache_key(patient):
+    """Build a stable cache key from every patient field that feeds the wellness plan"""
+    vitals = patient.vitals
+    labs = patient.lab_results
+    history = patient.medical_history
+    fingerprint = (
+        patient.patient_id, patient.name, patient.age, patient.gender.value,
+        vitals.systolic_bp, vitals.diastolic_bp, vitals.heart_rate, vitals.weight, vitals.height,
+        labs.fasting_glucose, labs.hba1c, labs.total_cholesterol, labs.ldl_cholesterol,
+        labs.hdl_cholesterol, labs.triglycerides,
+        tuple(history.conditions), tuple(history.medications), tuple(history.family_history)
+    )
+    return hashlib.blake2b(repr(fingerprint).encode(), digest_size=16).digest()
+
 def initialize_assistant():
-    """Initialize and train the healthcare assistant"""
-    global assistant, db
+    """Initialize and train the healthcare assistant
+    
+    The database opened here is closed again before returning: under gunicorn
+    --preload this runs in the master, and SQLite connections must not be
+    inherited by forked workers. Request handlers use ensure_database_open().
+    """
+    global assistant, _CLUSTERS_JSON
     try:
         config = get_config()
         assistant = PersonalizedHealthcareAssistant(config)
 
-        # Initialize database
-        db = PatientDatabase()
-
-        # Check if database has patients, if not populate with sample data
-        if db.get_patient_count() == 0:
-            print("📊 Populating database with sample patients...")
-            db.populate_sample_data()
-
-        # Train with sample data from database
-        all_patients_data = db.get_all_patients()
-        training_patients = []
-        for patient_data in all_patients_data:
-            patient = db.get_patient_by_id(patient_data['patient_id'])
-            if patient:
-                training_patients.append(patient)
+        # Read the training patients, populating an empty database with sample data
+        training_db = PatientDatabase()
+        try:
+            if training_db.get_patient_count() == 0:
+                print("📊 Populating database with sample patients...")
+                training_db.populate_sample_data()
+            training_patients = training_db.get_all_patients_full()
+        finally:
+            training_db.close()
+
+        # Reuse a model another worker already trained on the same patients
+        snapshot_dir = _snapshot_dir()
+        snapshot_path = None
+        if snapshot_dir is not None:
+            snapshot_path = _model_snapshot_path(snapshot_dir, training_patients, config)
+        if snapshot_path is not None and os.path.exists(snapshot_path):
+            if not _is_private_file(snapshot_path):
+                print(f"⚠️ Ignoring model snapshot not privately owned by this user: {snapshot_path}")
+            else:
+                try:
+                    assistant.ml_engine.load_model(snapshot_path)
+                except Exception as e:
+                    print(f"⚠️ Could not load model snapshot, retraining: {e}")
+        
+        if assistant.ml_engine.is_trained:
+            print(f"✅ Assistant initialized from snapshot: {snapshot_path}")
+        else:
+            # Train with sample data from database
+            training_results = assistant.train_model(training_patients)
+            if snapshot_path is not None:
+                _save_model_snapshot(assistant.ml_engine, snapshot_path)
 
-        training_results = assistant.train_model(training_patients)
+            print(f"✅ Assistant initialized successfully!")
+            print(f"   - Silhouette Score: {training_results['silhouette_score']:.3f}")
+            print(f"   - Training Samples: {training_results['n_samples']}")
 
-        print(f"✅ Assistant initialized successfully!")
-        print(f"   - Silhouette Score: {training_results['silhouette_score']:.3f}")
-        print(f"   - Training Samples: {training_results['n_samples']}")
-        print(f"   - Database Patients: {db.get_patient_count()}")
+        _CLUSTERS_JSON = _build_clusters_json(assistant.ml_engine)
+        print(f"   - Database Patients: {len(training_patients)}")
 
         return True
     except Exception as e:
         print(f"❌ Error initializing assistant: {e}")
         return False
 
+def ensure_assistant_initialized():
+    """Initialize the assistant once per worker, on first use, retrying a failure
+    at most every INIT_RETRY_SECONDS"""
+    global _INITIALIZED, _INIT_FAILED_AT
+    if not _INITIALIZED:
+        with _INIT_LOCK:
+            if not _INITIALIZED and (_INIT_FAILED_AT is None
+                                     or time.monotonic() - _INIT_FAILED_AT >= INIT_RETRY_SECONDS):
+                _INITIALIZED = initialize_assistant()
+                _INIT_FAILED_AT = None if _INITIALIZED else time.monotonic()
+    return _INITIALIZED
+
+def ensure_database_open():
+    """Open this process's database on first use, so each worker has its own connections"""
+    global db, _DB_PID
+    if _DB_PID != os.getpid():
+        with _DB_LOCK:
+            if _DB_PID != os.getpid():
+                db = PatientDatabase()
+                _DB_PID = os.getpid()
+    return db
+
+@app.before_request
+def _lazy_initialize():
+    # Answer CORS preflights for known routes immediately; after_request adds the
+    # headers. Preflights to unknown paths fall through to Flask's 404, and neither
+    # kind initializes the assistant
+    if request.method == 'OPTIONS':
+        if request.url_rule is not None:
+            return Response(status=204)
+        return None
+    if ensure_assistant_initialized():
+        ensure_database_open()
+
+def _snapshot_dir():
+    """The per-user snapshot directory, created mode 0700, or None if it can't be trusted
+    
+    Snapshots are unpickled on load, so they are only kept where no other user can
+    plant or replace a file.
+    """
+    if not hasattr(os, 'getuid'):
+        return None
+    path = os.path.join(SNAPSHOT_ROOT, f"hc_models_{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    except OSError as e:
+        print(f"⚠️ Model snapshots disabled: {e}")
+        return None
+    
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        print(f"⚠️ Model snapshots disabled: {path} is not a private directory owned by this user")
+        return None
+    return path
+
+def _is_private_file(path):
+    """Whether path is a regular file owned by this user that no one else can write"""
+    info = os.lstat(path)
+    return stat.S_ISREG(info.st_mode) and info.st_uid == os.getuid() and not info.st_mode & 0o022
+
+def _model_snapshot_path(snapshot_dir, training_patients, config):
+    """Snapshot file name derived from the training features and ML settings, so a
+    model is only reused for exactly the data and configuration it was fitted on"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(patients_to_matrix(training_patients).tobytes())
+    # Cluster profiles also read each patient's condition names
+    digest.update(orjson.dumps([p.medical_history.conditions for p in training_patients]))
+    digest.update(repr((FEATURE_NAMES, sorted(config.ML_CONFIG.items()))).encode())
+    return os.path.join(snapshot_dir, f"hc_model_{digest.hexdigest()}.joblib")
+
+def _save_model_snapshot(ml_engine, snapshot_path):
+    """Write the fitted model atomically so concurrent workers never read a partial file"""
+    snapshot_dir = os.path.dirname(snapshot_path)
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, suffix='.tmp')
+        os.close(fd)
+        ml_engine.save_model(tmp_path)
+        os.replace(tmp_path, snapshot_path)
+        tmp_path = None
+    except Exception as e:
+        print(f"⚠️ Could not save model snapshot: {e}")
+        return
+    finally:
+        if tmp_path is not None:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+    
+    # Snapshots of earlier database states are never loaded again
+    for name in os.listdir(snapshot_dir):
+        path = os.path.join(snapshot_dir, name)
+        if name.startswith('hc_model_') and name.endswith('.joblib') and path != snapshot_path:
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+
+def _build_clusters_json(ml_engine):
+    """Encode the cluster listing once; profiles do not change after training"""
+    clusters = []
+    for cluster_id, profile in ml_engine.cluster_profiles.items():
+        clusters.append({
+            'cluster_id': int(cluster_id),
+            'cluster_name': profile.cluster_name,
+            'characteristics': profile.characteristics,
+            'typical_conditions': profile.typical_conditions,
+            'risk_factors': profile.risk_factors
+        })
+    
+    return orjson.dumps({'clusters': clusters})
+
 @app.route('/')
 def index():
     """Home page"""
     return render_template('index.html')
 
 @app.route('/analyze', methods=['GET', 'POST'])
-def analyze():
+async def analyze():
     """Patient analysis page"""
     if request.method == 'GET':
         return render_template('analyze.html')
     
+    local_assistant = assistant
     try:
         # Get form data
         data = request.get_json() if request.is_json else request.form
@@ -76,64 +288,22 @@ def analyze():
         patient = create_patient_from_form(data)
         
         # Generate wellness plan
-        if assistant is None:
-            return jsonify({'error': 'Assistant not initialized'}), 500
+        if local_assistant is None:
+            return ojsonify({'error': 'Assistant not initialized'}, 500)
         
-        wellness_plan = assistant.generate_wellness_plan(patient)
-        
-        # Convert to JSON-serializable format
-        result = {
-            'patient_info': {
-                'name': patient.name,
-                'patient_id': patient.patient_id,
-                'age': patient.age,
-                'gender': patient.gender.value,
-                'bmi': patient.vitals.bmi
-            },
-            'cluster_analysis': {
-                'cluster_id': wellness_plan.cluster_profile.cluster_id,
-                'cluster_name': wellness_plan.cluster_profile.cluster_name,
-                'similarity_score': round(wellness_plan.cluster_profile.similarity_score * 100, 1),
-                'confidence_level': round(wellness_plan.cluster_profile.confidence_level * 100, 1),
-                'characteristics': wellness_plan.cluster_profile.characteristics[:3]
-            },
-            'nutrition': {
-                'foods_to_emphasize': wellness_plan.nutrition.foods_to_emphasize[:5],
-                'foods_to_avoid': wellness_plan.nutrition.foods_to_avoid[:5],
-                'meal_planning_tips': wellness_plan.nutrition.meal_planning_tips,
-                'hydration_guidelines': wellness_plan.nutrition.hydration_guidelines
-            },
-            'lifestyle': {
-                'exercise_type': wellness_plan.lifestyle.exercise_type,
-                'exercise_frequency': wellness_plan.lifestyle.exercise_frequency,
-                'sleep_recommendations': wellness_plan.lifestyle.sleep_recommendations[:3],
-                'stress_management': wellness_plan.lifestyle.stress_management[:3]
-            },
-            'supplements': {
-                'recommended_supplements': wellness_plan.supplements.recommended_supplements[:3],
-                'contraindications': wellness_plan.supplements.contraindications
-            },
-            'safety_alerts': {
-                'risk_level': wellness_plan.safety_alerts.risk_level.value,
-                'follow_up_timeline': wellness_plan.safety_alerts.follow_up_timeline,
-                'specialist_referrals': wellness_plan.safety_alerts.specialist_referrals,
-                'warning_signs': wellness_plan.safety_alerts.warning_signs[:3]
-            },
-            'full_report': wellness_plan.to_formatted_report()
-        }
+        result, _ = await _cached_plan_result(local_assistant, patient)
         
         if request.is_json:
-            return jsonify(result)
+            return ojsonify(result)
         else:
             return render_template('results.html', result=result)
             
     except Exception as e:
         error_msg = f"Error analyzing patient: {str(e)}"
-        print(f"❌ {error_msg}")
-        print(traceback.format_exc())
+        logger.exception(error_msg)
         
         if request.is_json:
-            return jsonify({'error': error_msg}), 500
+            return ojsonify({'error': error_msg}, 500)
         else:
             flash(error_msg, 'error')
             return redirect(url_for('analyze'))
@@ -141,20 +311,16 @@ def analyze():
 @app.route('/api/clusters')
 def get_clusters():
     """API endpoint to get cluster information"""
-    if assistant is None or not assistant.ml_engine.is_trained:
-        return jsonify({'error': 'Assistant not initialized'}), 500
+    global _CLUSTERS_JSON
+    local_assistant = assistant
+    if local_assistant is None or not local_assistant.ml_engine.is_trained:
+        return ojsonify({'error': 'Assistant not initialized'}, 500)
     
-    clusters = []
-    for cluster_id, profile in assistant.ml_engine.cluster_profiles.items():
-        clusters.append({
-            'cluster_id': cluster_id,
-            'cluster_name': profile.cluster_name,
-            'characteristics': profile.characteristics,
-            'typical_conditions': profile.typical_conditions,
-            'risk_factors': profile.risk_factors
-        })
+    clusters_json = _CLUSTERS_JSON
+    if clusters_json is None:
+        clusters_json = _CLUSTERS_JSON = _build_clusters_json(local_assistant.ml_engine)
     
-    return jsonify({'clusters': clusters})
+    return Response(clusters_json, mimetype='application/json')
 
 @app.route('/demo')
 def demo():
@@ -167,32 +333,42 @@ def pharmacy():
     return render_template('pharmacy.html')
 
 @app.route('/api/search_patients')
-def search_patients():
+async def search_patients():
     """API endpoint to search patients by ID or name"""
     query = request.args.get('q', '').strip()
 
     if not query:
-        return jsonify({'patients': []})
+        return ojsonify({'patients': []})
 
-    if db is None:
-        return jsonify({'error': 'Database not initialized'}), 500
+    local_db = db
+    if local_db is None:
+        return ojsonify({'error': 'Database not initialized'}, 500)
 
     try:
-        patients = db.search_patients(query)
-        return jsonify({'patients': patients})
+        patients = await run_blocking(local_db.search_patients, query)
+        return ojsonify({'patients': patients})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}, 500)
+
+# Fields exposed by /api/patient, read with one C-level attrgetter call per section
+_VITALS_KEYS = ('systolic_bp', 'diastolic_bp', 'heart_rate', 'weight', 'height', 'bmi')
+_LAB_KEYS = ('fasting_glucose', 'hba1c', 'total_cholesterol', 'ldl_cholesterol', 'hdl_cholesterol', 'triglycerides')
+_HISTORY_KEYS = ('conditions', 'medications', 'family_history')
+_get_vitals = operator.attrgetter(*_VITALS_KEYS)
+_get_labs = operator.attrgetter(*_LAB_KEYS)
+_get_history = operator.attrgetter(*_HISTORY_KEYS)
 
 @app.route('/api/patient/<patient_id>')
-def get_patient_details(patient_id):
+async def get_patient_details(patient_id):
     """API endpoint to get patient details by ID"""
-    if db is None:
-        return jsonify({'error': 'Database not initialized'}), 500
+    local_db = db
+    if local_db is None:
+        return ojsonify({'error': 'Database not initialized'}, 500)
 
     try:
-        patient = db.get_patient_by_id(patient_id)
+        patient = await run_blocking(local_db.get_patient_by_id, patient_id)
         if not patient:
-            return jsonify({'error': 'Patient not found'}), 404
+            return ojsonify({'error': 'Patient not found'}, 404)
 
         # Convert patient to JSON-serializable format
         patient_data = {
@@ -200,108 +376,158 @@ def get_patient_details(patient_id):
             'name': patient.name,
             'age': patient.age,
             'gender': patient.gender.value,
-            'vitals': {
-                'systolic_bp': patient.vitals.systolic_bp,
-                'diastolic_bp': patient.vitals.diastolic_bp,
-                'heart_rate': patient.vitals.heart_rate,
-                'weight': patient.vitals.weight,
-                'height': patient.vitals.height,
-                'bmi': patient.vitals.bmi
-            },
-            'lab_results': {
-                'fasting_glucose': patient.lab_results.fasting_glucose,
-                'hba1c': patient.lab_results.hba1c,
-                'total_cholesterol': patient.lab_results.total_cholesterol,
-                'ldl_cholesterol': patient.lab_results.ldl_cholesterol,
-                'hdl_cholesterol': patient.lab_results.hdl_cholesterol,
-                'triglycerides': patient.lab_results.triglycerides
-            },
-            'medical_history': {
-                'conditions': patient.medical_history.conditions,
-                'medications': patient.medical_history.medications,
-                'family_history': patient.medical_history.family_history
-            },
+            'vitals': dict(zip(_VITALS_KEYS, _get_vitals(patient.vitals))),
+            'lab_results': dict(zip(_LAB_KEYS, _get_labs(patient.lab_results))),
+            'medical_history': dict(zip(_HISTORY_KEYS, _get_history(patient.medical_history))),
             'symptoms': patient.symptoms
         }
 
-        return jsonify({'patient': patient_data})
+        return ojsonify({'patient': patient_data})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}, 500)
 
 @app.route('/pharmacy/analyze', methods=['POST'])
-def pharmacy_analyze():
+async def pharmacy_analyze():
     """Analyze patient from pharmacy interface"""
     try:
         data = request.get_json()
         patient_identifier = data.get('patient_identifier', '').strip()
 
         if not patient_identifier:
-            return jsonify({'error': 'Patient ID or name is required'}), 400
+            return ojsonify({'error': 'Patient ID or name is required'}, 400)
 
-        if db is None:
-            return jsonify({'error': 'Database not initialized'}), 500
+        local_assistant = assistant
+        local_db = db
+        if local_assistant is None or local_db is None:
+            return ojsonify({'error': 'Assistant not initialized'}, 500)
 
         # Try to find patient by ID first, then by name
-        patient = db.get_patient_by_id(patient_identifier)
+        patient = await run_blocking(local_db.get_patient_by_id, patient_identifier)
         if not patient:
-            patient = db.get_patient_by_name(patient_identifier)
+            patient = await run_blocking(local_db.get_patient_by_name, patient_identifier)
 
         if not patient:
-            return jsonify({'error': f'Patient not found: {patient_identifier}'}), 404
+            return ojsonify({'error': f'Patient not found: {patient_identifier}'}, 404)
 
-        # Generate wellness plan
-        if assistant is None:
-            return jsonify({'error': 'Assistant not initialized'}), 500
-
-        wellness_plan = assistant.generate_wellness_plan(patient)
-
-        # Convert to JSON-serializable format (same as analyze route)
-        result = {
-            'patient_info': {
-                'name': patient.name,
-                'patient_id': patient.patient_id,
-                'age': patient.age,
-                'gender': patient.gender.value,
-                'bmi': patient.vitals.bmi
-            },
-            'cluster_analysis': {
-                'cluster_id': wellness_plan.cluster_profile.cluster_id,
-                'cluster_name': wellness_plan.cluster_profile.cluster_name,
-                'similarity_score': round(wellness_plan.cluster_profile.similarity_score * 100, 1),
-                'confidence_level': round(wellness_plan.cluster_profile.confidence_level * 100, 1),
-                'characteristics': wellness_plan.cluster_profile.characteristics[:3]
-            },
-            'nutrition': {
-                'foods_to_emphasize': wellness_plan.nutrition.foods_to_emphasize[:5],
-                'foods_to_avoid': wellness_plan.nutrition.foods_to_avoid[:5],
-                'meal_planning_tips': wellness_plan.nutrition.meal_planning_tips,
-                'hydration_guidelines': wellness_plan.nutrition.hydration_guidelines
-            },
-            'lifestyle': {
-                'exercise_type': wellness_plan.lifestyle.exercise_type,
-                'exercise_frequency': wellness_plan.lifestyle.exercise_frequency,
-                'sleep_recommendations': wellness_plan.lifestyle.sleep_recommendations[:3],
-                'stress_management': wellness_plan.lifestyle.stress_management[:3]
-            },
-            'supplements': {
-                'recommended_supplements': wellness_plan.supplements.recommended_supplements[:3],
-                'contraindications': wellness_plan.supplements.contraindications
-            },
-            'safety_alerts': {
-                'risk_level': wellness_plan.safety_alerts.risk_level.value,
-                'follow_up_timeline': wellness_plan.safety_alerts.follow_up_timeline,
-                'specialist_referrals': wellness_plan.safety_alerts.specialist_referrals,
-                'warning_signs': wellness_plan.safety_alerts.warning_signs[:3]
-            },
-            'full_report': wellness_plan.to_formatted_report()
-        }
+        # Generate wellness plan; stored patients' reports can be re-fetched from any worker
+        result, _ = await _cached_plan_result(local_assistant, patient)
 
-        return jsonify(result)
+        return ojsonify({**result, 'report_url': url_for('get_patient_report', patient_id=patient.patient_id)})
 
     except Exception as e:
         error_msg = f"Error analyzing patient: {str(e)}"
-        print(f"❌ {error_msg}")
-        return jsonify({'error': error_msg}), 500
+        logger.exception(error_msg)
+        return ojsonify({'error': error_msg}, 500)
+
+async def _cached_plan_result(local_assistant, patient):
+    """Return the serialized wellness plan and its report sections, computing them on a cache miss
+    
+    Only the plan and the report body are cached; the closing "Generated on"
+    line is stamped per request, so repeat requests never show a stale time.
+    """
+    key = _plan_cache_key(patient)
+    with _PLAN_LOCK:
+        entry = _PLAN_CACHE.get(key)
+    
+    if entry is None:
+        wellness_plan = await run_blocking(local_assistant.generate_wellness_plan, patient)
+        report_body = tuple(wellness_plan.iter_report_sections())[:-1]
+        entry = (_plan_to_result(patient, wellness_plan), report_body)
+        with _PLAN_LOCK:
+            _PLAN_CACHE[key] = entry
+    
+    result, report_body = entry
+    report_sections = (*report_body, WellnessPlan.report_footer(datetime.now()))
+    return {**result, 'full_report': ''.join(report_sections).strip()}, report_sections
+
+@app.route('/api/patient/<patient_id>/report')
+async def get_patient_report(patient_id):
+    """Stream the formatted report of a stored patient
+    
+    The report is rebuilt from the database whenever this worker's plan cache
+    does not hold it, so the URL works on every worker.
+    """
+    local_assistant = assistant
+    local_db = db
+    if local_assistant is None or local_db is None:
+        return ojsonify({'error': 'Assistant not initialized'}, 500)
+    
+    try:
+        patient = await run_blocking(local_db.get_patient_by_id, patient_id)
+        if not patient:
+            return ojsonify({'error': 'Patient not found'}, 404)
+        
+        _, report_sections = await _cached_plan_result(local_assistant, patient)
+        return Response(iter(report_sections), mimetype='text/plain')
+    except Exception as e:
+        error_msg = f"Error generating report: {str(e)}"
+        logger.exception(error_msg)
+        return ojsonify({'error': error_msg}, 500)
+
+def _plan_to_result(patient, wellness_plan):
+    """Convert a wellness plan to the JSON-serializable shape shared by the analyze routes"""
+    vitals = patient.vitals
+    cluster = wellness_plan.cluster_profile
+    nutrition = wellness_plan.nutrition
+    lifestyle = wellness_plan.lifestyle
+    supplements = wellness_plan.supplements
+    safety = wellness_plan.safety_alerts
+    
+    return {
+        'patient_info': {
+            'name': patient.name,
+            'patient_id': patient.patient_id,
+            'age': patient.age,
+            'gender': patient.gender.value,
+            'bmi': vitals.bmi
+        },
+        'cluster_analysis': {
+            'cluster_id': cluster.cluster_id,
+            'cluster_name': cluster.cluster_name,
+            'similarity_score': round(cluster.similarity_score * 100, 1),
+            'confidence_level': round(cluster.confidence_level * 100, 1),
+            'characteristics': cluster.characteristics[:3]
+        },
+        'nutrition': {
+            'foods_to_emphasize': nutrition.foods_to_emphasize[:5],
+            'foods_to_avoid': nutrition.foods_to_avoid[:5],
+            'meal_planning_tips': nutrition.meal_planning_tips,
+            'hydration_guidelines': nutrition.hydration_guidelines
+        },
+        'lifestyle': {
+            'exercise_type': lifestyle.exercise_type,
+            'exercise_frequency': lifestyle.exercise_frequency,
+            'sleep_recommendations': lifestyle.sleep_recommendations[:3],
+            'stress_management': lifestyle.stress_management[:3]
+        },
+        'supplements': {
+            'recommended_supplements': [dict(supplement) for supplement in supplements.recommended_supplements[:3]],
+            'contraindications': supplements.contraindications
+        },
+        'safety_alerts': {
+            'risk_level': safety.risk_level.value,
+            'follow_up_timeline': safety.follow_up_timeline,
+            'specialist_referrals': safety.specialist_referrals,
+            'warning_signs': safety.warning_signs[:3]
+        }
+    }
+
+_GENDER_MAP = {'male': Gender.MALE, 'female': Gender.FEMALE}
+
+# Numeric form fields and the type each is parsed as
+_VITAL_FIELDS = (
+    ('systolic_bp', int), ('diastolic_bp', int), ('heart_rate', int),
+    ('weight', float), ('height', float)
+)
+_LAB_FIELDS = (
+    ('fasting_glucose', float), ('hba1c', float), ('total_cholesterol', float),
+    ('ldl_cholesterol', float), ('hdl_cholesterol', float), ('triglycerides', float)
+)
+
+def _coerce(data, key, cast):
+    """Parse a form value with a single lookup, treating blank values as missing"""
+    value = data.get(key)
+    return cast(value) if value else None
 
 def create_patient_from_form(data):
     """Create a Patient object from form data"""
@@ -311,25 +537,14 @@ def create_patient_from_form(data):
     age = int(data.get('age', 50))
     gender_str = data.get('gender', 'female').lower()
     
-    gender = Gender.MALE if gender_str == 'male' else Gender.FEMALE if gender_str == 'female' else Gender.OTHER
+    gender = _GENDER_MAP.get(gender_str, Gender.OTHER)
     
     # Vitals
-    vitals = VitalSigns(
-        systolic_bp=int(data.get('systolic_bp', 120)) if data.get('systolic_bp') else None,
-        diastolic_bp=int(data.get('diastolic_bp', 80)) if data.get('diastolic_bp') else None,
-        heart_rate=int(data.get('heart_rate', 70)) if data.get('heart_rate') else None,
-        weight=float(data.get('weight', 70)) if data.get('weight') else None,
-        height=float(data.get('height', 170)) if data.get('height') else None
-    )
+    vitals = VitalSigns(**{key: _coerce(data, key, cast) for key, cast in _VITAL_FIELDS})
     
     # Lab results
     lab_results = LabResults(
-        fasting_glucose=float(data.get('fasting_glucose', 100)) if data.get('fasting_glucose') else None,
-        hba1c=float(data.get('hba1c', 5.5)) if data.get('hba1c') else None,
-        total_cholesterol=float(data.get('total_cholesterol', 200)) if data.get('total_cholesterol') else None,
-        ldl_cholesterol=float(data.get('ldl_cholesterol', 130)) if data.get('ldl_cholesterol') else None,
-        hdl_cholesterol=float(data.get('hdl_cholesterol', 50)) if data.get('hdl_cholesterol') else None,
-        triglycerides=float(data.get('triglycerides', 150)) if data.get('triglycerides') else None,
+        **{key: _coerce(data, key, cast) for key, cast in _LAB_FIELDS},
         test_date=datetime.now()
     )
     
@@ -362,14 +577,48 @@ def not_found(error):
 def internal_error(error):
     return render_template('error.html', error="Internal server error"), 500
 
+# Under `gunicorn --preload` the assistant is trained once in the master so
+# forked workers share the fitted model pages copy-on-write; the master keeps no
+# database connection open, and each worker opens its own
+if os.getenv('PRELOAD_ASSISTANT'):
+    ensure_assistant_initialized()
+
+def run_gunicorn():
+    """Replace this process with a preloaded multi-worker gunicorn server
+    
+    Returns only if gunicorn is not installed.
+    """
+    executable = shutil.which('gunicorn')
+    if executable is None:
+        return
+    os.environ['PRELOAD_ASSISTANT'] = '1'
+    os.execv(executable, [
+        'gunicorn',
+        '-w', os.getenv('GUNICORN_WORKERS', '4'),
+        '--threads', os.getenv('GUNICORN_THREADS', '8'),
+        '--preload',
+        '-b', '0.0.0.0:5000',
+        'app:app'
+    ])
+
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     print("🏥 Starting AI-Powered Personalized Healthcare Assistant Web App")
     print("=" * 60)
     
+    # Only development uses the single-process Werkzeug server
+    production = os.getenv('FLASK_ENV', 'development') != 'development'
+    if os.getenv('USE_GUNICORN') or production:
+        print("🚀 Starting gunicorn server...")
+        run_gunicorn()
+        print("⚠️  gunicorn is not installed (pip install gunicorn); "
+              "falling back to the single-process Flask server")
+    
     # Initialize assistant
-    if initialize_assistant():
+    if ensure_assistant_initialized():
         print("🚀 Starting Flask server...")
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        # Never expose the interactive debugger outside development
+        app.run(debug=not production, host='0.0.0.0', port=5000)
     else:
         print("❌ Failed to initialize assistant. Exiting.")
         exit(1)
@@ -3,8 +3,28 @@ Configuration settings for the AI-Powered Personalized Healthcare Assistant
 """
 
 import os
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, Any
 
+def _flatten_thresholds(tree: Dict[str, Any], prefix: tuple = ()) -> Dict[tuple, tuple]:
+    """Flatten nested threshold ranges into a single dict keyed by their path"""
+    flat = {}
+    for key, value in tree.items():
+        if isinstance(value, tuple):
+            flat[prefix + (key,)] = value
+        else:
+            flat.update(_flatten_thresholds(value, prefix + (key,)))
+    return flat
+
+def _freeze_lists(tree: Any) -> Any:
+    """Make a nested table read-only: lists become tuples, dicts become mapping proxies"""
+    if isinstance(tree, dict):
+        return MappingProxyType({key: _freeze_lists(value) for key, value in tree.items()})
+    if isinstance(tree, list):
+        return tuple(_freeze_lists(value) for value in tree)
+    return tree
+
 class Config:
     """Main configuration class for the healthcare assistant"""
     
@@ -14,15 +34,20 @@ class Config:
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
     
     # Machine Learning Settings
-    ML_CONFIG = {
+    ML_CONFIG = MappingProxyType({
         "n_clusters": 5,  # Number of clusters for K-Means
         "pca_components": 3,  # Number of PCA components
         "random_state": 42,  # For reproducible results
         "cluster_confidence_threshold": 0.7,  # Minimum confidence for cluster assignment
-    }
+        "silhouette_sample_size": 2000,  # Larger training sets estimate the silhouette from a sample
+        "use_minibatch": True,  # Train large cohorts with MiniBatchKMeans
+        "minibatch_threshold": 5000,  # Cohort size above which MiniBatchKMeans is used
+        "kmeans_algorithm": "lloyd",  # Full-batch K-Means algorithm ("lloyd" or "elkan")
+        "kmeans_n_init": 10,  # Full-batch K-Means restarts
+    })
     
     # Health Risk Thresholds
-    HEALTH_THRESHOLDS = {
+    HEALTH_THRESHOLDS = _freeze_lists({
         "blood_pressure": {
             "normal": {"systolic": (90, 120), "diastolic": (60, 80)},
             "elevated": {"systolic": (120, 129), "diastolic": (60, 80)},
@@ -51,10 +76,19 @@ class Config:
             "ldl": {"optimal": (0, 100), "near_optimal": (100, 129), "borderline": (130, 159), "high": (160, 189), "very_high": (190, float('inf'))},
             "hdl": {"low": (0, 40), "normal": (40, 60), "high": (60, float('inf'))}
         }
-    }
+    })
+    
+    # Same ranges keyed by path, e.g. ('blood_pressure', 'stage1', 'systolic');
+    # HEALTH_THRESHOLDS is frozen all the way down, so the two cannot drift apart
+    FLAT_THRESHOLDS = MappingProxyType(_flatten_thresholds(HEALTH_THRESHOLDS))
+    
+    @classmethod
+    def threshold(cls, *path: str) -> tuple:
+        """Look up a health threshold range with a single dict access"""
+        return cls.FLAT_THRESHOLDS[path]
     
     # Indian Dietary Recommendations Database
-    NUTRITION_DATABASE = {
+    NUTRITION_DATABASE = _freeze_lists({
         "diabetes_risk": {
             "recommended": [
                 "bitter gourd", "fenugreek leaves", "spinach",
@@ -108,10 +142,10 @@ class Config:
                 "aerated drinks", "excessive sugar", "refined flour products"
             ]
         }
-    }
+    })
     
     # Exercise Recommendations
-    EXERCISE_GUIDELINES = {
+    EXERCISE_GUIDELINES = MappingProxyType({
         "beginner": {
             "aerobic": "20-30 minutes, 3-4 times per week, low to moderate intensity",
             "strength": "2 times per week, bodyweight exercises",
@@ -127,10 +161,10 @@ class Config:
             "strength": "3-4 times per week, progressive resistance training",
             "flexibility": "20-30 minutes daily comprehensive mobility work"
         }
-    }
+    })
     
     # Supplement Guidelines (English Medicine/Allopathic)
-    SUPPLEMENT_DATABASE = {
+    SUPPLEMENT_DATABASE = _freeze_lists({
         "diabetes_prevention": [
             {"name": "Chromium Picolinate", "dosage": "200-400 mcg daily", "timing": "with meals"},
             {"name": "Alpha-Lipoic Acid", "dosage": "300-600 mg daily", "timing": "before meals"},
@@ -158,10 +192,10 @@ class Config:
             {"name": "Vitamin B12", "dosage": "1000 mcg daily", "timing": "with breakfast"},
             {"name": "Iron (if deficient)", "dosage": "18-27 mg daily", "timing": "on empty stomach"}
         ]
-    }
+    })
     
     # Warning Signs for Medical Attention
-    WARNING_SIGNS = {
+    WARNING_SIGNS = _freeze_lists({
         "immediate_attention": [
             "Chest pain or pressure",
             "Difficulty breathing",
@@ -179,7 +213,7 @@ class Config:
             "Slow-healing wounds",
             "Numbness or tingling in extremities"
         ]
-    }
+    })
 
 class DevelopmentConfig(Config):
     """Development environment configuration"""
@@ -190,8 +224,9 @@ class ProductionConfig(Config):
     DEBUG = False
 
 # Configuration factory
+@lru_cache(maxsize=1)
 def get_config():
-    """Get configuration based on environment"""
+    """Get configuration based on environment (resolved once per process)"""
     env = os.getenv("FLASK_ENV", "development")
     if env == "production":
         return ProductionConfig()
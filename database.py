@@ -2,25 +2,326 @@
 Database module for storing and retrieving patient information
 """
 
+import logging
 import sqlite3
-import json
-from typing import List, Optional, Dict, Any
+import orjson
+import queue
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from datetime import datetime
+from pathlib import Path
 import os
 
 from models import Patient, VitalSigns, LabResults, MedicalHistory, Gender
 
+logger = logging.getLogger(__name__)
+
+# Map up to 256 MB of the database file so reads are served from the page
+# cache instead of one pread() syscall per page
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Per-connection page cache; negative values are KiB, so this is 64 MB
+CACHE_SIZE_KIB = 64 * 1024
+
+# Upper bound on read-only connections open alongside the writer
+READER_POOL_SIZE = os.cpu_count() or 4
+
+# Number of patient rows kept in memory per database object
+PATIENT_CACHE_SIZE = 256
+
+# Bumped by migrations in init_database; stored in PRAGMA user_version
+SCHEMA_VERSION = 1
+
+# Genders are stored as small integer codes: the index into this tuple
+_GENDERS_BY_CODE = (Gender.MALE, Gender.FEMALE, Gender.OTHER)
+_GENDER_CODES = {gender: code for code, gender in enumerate(_GENDERS_BY_CODE)}
+
+# SQL statements are kept as module constants so every call binds the same
+# text and hits sqlite3's prepared-statement cache
+
+# Re-adding a patient updates their row in place, keeping its rowid and
+# created_at; INSERT OR REPLACE would delete and re-insert it without firing
+# delete triggers, leaving stale entries in patients_fts
+# Timestamps are written explicitly since databases created before the switch
+# to epoch columns still carry CURRENT_TIMESTAMP text defaults
+_SQL_INSERT_PATIENT = '''
+    INSERT INTO patients (patient_id, name, age, gender, created_at, updated_at)
+    VALUES (?, ?, ?, ?, unixepoch(), unixepoch())
+    ON CONFLICT (patient_id) DO UPDATE SET
+        name = excluded.name, age = excluded.age, gender = excluded.gender,
+        updated_at = unixepoch()
+'''
+# Vitals, labs, history and symptoms are append-only; readers take the latest row
+_SQL_INSERT_VITALS = '''
+    INSERT INTO vitals 
+    (patient_id, systolic_bp, diastolic_bp, heart_rate, temperature, 
+     respiratory_rate, oxygen_saturation, weight, height, recorded_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, unixepoch())
+'''
+_SQL_INSERT_LAB_RESULTS = '''
+    INSERT INTO lab_results 
+    (patient_id, fasting_glucose, hba1c, total_cholesterol, 
+     ldl_cholesterol, hdl_cholesterol, triglycerides, creatinine, bun, test_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_SQL_INSERT_MEDICAL_HISTORY = '''
+    INSERT INTO medical_history 
+    (patient_id, conditions, medications, allergies, family_history, surgeries, lifestyle_factors, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, unixepoch())
+'''
+_SQL_INSERT_SYMPTOMS = '''
+    INSERT INTO symptoms (patient_id, symptoms, recorded_at)
+    VALUES (?, ?, unixepoch())
+'''
+# Each patient joined with their latest vitals, lab, history and symptoms rows,
+# projected to the columns _construct_patient reads; a joined table's *_id
+# column is NULL when the patient has no record there
+_SQL_SELECT_PATIENTS_FULL = '''
+    SELECT p.patient_id, p.name, p.age, p.gender, p.created_at,
+           v.id AS vitals_id, v.systolic_bp, v.diastolic_bp, v.heart_rate, v.temperature,
+           v.respiratory_rate, v.oxygen_saturation, v.weight, v.height,
+           l.id AS lab_id, l.fasting_glucose, l.hba1c, l.total_cholesterol, l.ldl_cholesterol,
+           l.hdl_cholesterol, l.triglycerides, l.creatinine, l.bun, l.test_date,
+           h.id AS history_id, h.conditions, h.medications, h.allergies, h.family_history,
+           h.surgeries, h.lifestyle_factors,
+           s.id AS symptoms_id, s.symptoms
+    FROM patients p
+    LEFT JOIN vitals v ON v.id = (
+        SELECT id FROM vitals WHERE patient_id = p.patient_id
+        ORDER BY recorded_at DESC, id DESC LIMIT 1)
+    LEFT JOIN lab_results l ON l.id = (
+        SELECT id FROM lab_results WHERE patient_id = p.patient_id
+        ORDER BY test_date DESC, id DESC LIMIT 1)
+    LEFT JOIN medical_history h ON h.id = (
+        SELECT id FROM medical_history WHERE patient_id = p.patient_id
+        ORDER BY updated_at DESC, id DESC LIMIT 1)
+    LEFT JOIN symptoms s ON s.id = (
+        SELECT id FROM symptoms WHERE patient_id = p.patient_id
+        ORDER BY recorded_at DESC, id DESC LIMIT 1)
+'''
+_SQL_SELECT_PATIENT_FULL = _SQL_SELECT_PATIENTS_FULL + '    WHERE p.patient_id = ?\n'
+_SQL_SELECT_ALL_PATIENTS_FULL = _SQL_SELECT_PATIENTS_FULL + '    ORDER BY p.name\n'
+# IDs are bound as one JSON array so any number of them shares a single statement
+_SQL_SELECT_PATIENTS_FULL_BY_IDS = _SQL_SELECT_PATIENTS_FULL + '    WHERE p.patient_id IN (SELECT value FROM json_each(?))\n'
+# NOCASE and LIKE both fold ASCII case only, exactly as LOWER() did, without
+# lowercasing every row per query
+_SQL_SELECT_PATIENT_BY_NAME = 'SELECT patient_id FROM patients WHERE name = ? COLLATE NOCASE LIMIT 1'
+_SQL_SEARCH_PATIENTS = '''
+    SELECT patient_id, name, age, gender 
+    FROM patients 
+    WHERE patient_id LIKE ? OR name LIKE ?
+    ORDER BY name
+'''
+# Substring search through the trigram index; only usable for queries of at
+# least FTS_MIN_QUERY_LENGTH characters, shorter ones fall back to the LIKE scan
+_SQL_SEARCH_PATIENTS_FTS = '''
+    SELECT p.patient_id, p.name, p.age, p.gender
+    FROM patients_fts f
+    JOIN patients p ON p.rowid = f.rowid
+    WHERE patients_fts MATCH ?
+    ORDER BY p.name
+'''
+FTS_MIN_QUERY_LENGTH = 3
+_SQL_SELECT_ALL_PATIENTS = 'SELECT patient_id, name, age, gender FROM patients ORDER BY name'
+_SQL_COUNT_PATIENTS = 'SELECT COUNT(*) FROM patients'
+
+# Size of each connection's prepared-statement cache (the sqlite3 default,
+# pinned explicitly since every statement above is reused)
+CACHED_STATEMENTS = 128
+
+# medical_history JSON columns, in _SQL_INSERT_MEDICAL_HISTORY order
+_HISTORY_FIELDS = attrgetter('conditions', 'medications', 'allergies',
+                             'family_history', 'surgeries', 'lifestyle_factors')
+
+def _to_json(value: Any) -> str:
+    """Encode a list/dict column value as JSON text"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+class _PatientNotFound(LookupError):
+    """No stored patient has the requested ID"""
+
+# Connections a forked child inherited from its parent. SQLite handles must not be
+# used or closed on the far side of fork(), so the child keeps them referenced
+# here, never touching them, and opens its own
+_INHERITED_CONNECTIONS = []
+
+# Serialises reopening connections after a fork; replaced in every child, since a
+# thread in the parent may have held it at the moment of forking
+_FORK_LOCK = threading.Lock()
+
+def _reset_fork_lock():
+    global _FORK_LOCK
+    _FORK_LOCK = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_fork_lock)
+
+@lru_cache(maxsize=1)
+def _sample_patients() -> Tuple[Patient, ...]:
+    """Build the sample patients once per process; they are only read when inserted"""
+    from sample_data import create_sample_patients
+    return tuple(create_sample_patients())
+
+class _ReaderPool:
+    """Bounded pool of read connections, opened on first demand and reused"""
+    
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int):
+        self._connect = connect
+        self._slots = threading.BoundedSemaphore(size)
+        # LIFO so the most recently used connection, with the warmest cache, goes out first
+        self._idle = queue.LifoQueue()
+        self._opened = []
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the enclosed reads, blocking while all are in use"""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                with self._lock:
+                    self._opened.append(conn)
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+    
+    def abandon(self) -> List[sqlite3.Connection]:
+        """Hand over every connection the pool has opened without closing them"""
+        with self._lock:
+            opened, self._opened = self._opened, []
+        return opened
+    
+    def close(self):
+        """Close every connection the pool has opened"""
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
 class PatientDatabase:
     """SQLite database for patient management"""
     
     def __init__(self, db_path: str = "patients.db"):
         self.db_path = db_path
+        self._open_connections()
+        # Per-instance caches of patient rows and name lookups, cleared whenever
+        # this object writes or PRAGMA data_version shows another connection or
+        # process has committed. Rows are immutable; each lookup builds its own
+        # Patient from them. Misses raise, so only names that matched are kept
+        self._get_patient_row_cached = lru_cache(maxsize=PATIENT_CACHE_SIZE)(self._load_patient_row)
+        self._get_patient_id_cached = lru_cache(maxsize=PATIENT_CACHE_SIZE)(self._load_patient_id)
         self.init_database()
+    
+    def _open_connections(self):
+        """Open this process's writer connection and reader pool"""
+        # Connections belong to the process that opened them; a forked child
+        # reopens its own on first use (see _ensure_process)
+        self._pid = os.getpid()
+        # Last PRAGMA data_version seen on each read connection; the counter is per connection
+        self._data_versions = {}
+        # One writer connection, shared across threads; autocommit mode with
+        # explicit transactions around writes
+        self._conn = self._connect()
+        self._lock = threading.RLock()
+        # Under WAL, reads go through separate read-only connections so they
+        # don't queue behind the writer; an in-memory database exists only on
+        # the writer connection, so there reads share it
+        self._readers = None
+        if self.db_path != ':memory:':
+            self._readers = _ReaderPool(lambda: self._connect(read_only=True), READER_POOL_SIZE)
+    
+    def _ensure_process(self):
+        """Replace connections inherited across fork() with ones opened by this process
+        
+        The inherited handles, their locks and any held pool slots belong to the
+        parent; they are set aside unused rather than closed.
+        """
+        if self._pid == os.getpid():
+            return
+        with _FORK_LOCK:
+            if self._pid == os.getpid():
+                return
+            if self.db_path == ':memory:':
+                raise RuntimeError("An in-memory PatientDatabase cannot be used across fork()")
+            _INHERITED_CONNECTIONS.append(self._conn)
+            _INHERITED_CONNECTIONS.extend(self._readers.abandon())
+            self._open_connections()
+            self._invalidate_cache()
+    
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a connection configured for memory-mapped reads and cheap commits"""
+        if read_only:
+            database = Path(self.db_path).absolute().as_uri() + '?mode=ro'
+        else:
+            database = self.db_path
+        conn = sqlite3.connect(database, uri=read_only, check_same_thread=False, isolation_level=None,
+                               cached_statements=CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        # Under WAL, NORMAL only syncs at checkpoints: a power loss can drop the
+        # last commits but never corrupts the database
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KIB}')
+        return conn
+    
+    def close(self):
+        """Close the writer and any pooled read connections"""
+        self._ensure_process()
+        if self._readers is not None:
+            self._readers.close()
+        with self._lock:
+            self._conn.close()
+    
+    @contextmanager
+    def _read_connection(self):
+        """Check out a connection for reads that don't need the writer"""
+        self._ensure_process()
+        if self._readers is None:
+            with self._lock:
+                yield self._conn
+        else:
+            with self._readers.connection() as conn:
+                yield conn
+    
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in one transaction on the shared connection"""
+        self._ensure_process()
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute('BEGIN')
+            try:
+                yield cursor
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
         
     def init_database(self):
         """Initialize the database with required tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._transaction() as cursor:
+            self._create_tables(cursor)
+            self._migrate_gender_to_integer(cursor)
+            self._migrate_timestamps_to_epoch(cursor)
+            self._create_indexes(cursor)
+            self._create_search_index(cursor)
+        
+        # WAL lets readers run alongside a writer, though writers still take
+        # turns; the mode is stored in the file and can't change inside a transaction
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+    
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """Create any missing tables"""
         
         # Create patients table
         cursor.execute('''
@@ -28,9 +329,9 @@ class PatientDatabase:
                 patient_id TEXT PRIMARY KEY,
                 name TEXT NOT NULL,
                 age INTEGER NOT NULL,
-                gender TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                gender INTEGER NOT NULL,
+                created_at INTEGER DEFAULT (unixepoch()),
+                updated_at INTEGER DEFAULT (unixepoch())
             )
         ''')
         
@@ -47,7 +348,7 @@ class PatientDatabase:
                 oxygen_saturation REAL,
                 weight REAL,
                 height REAL,
-                recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                recorded_at INTEGER DEFAULT (unixepoch()),
                 FOREIGN KEY (patient_id) REFERENCES patients (patient_id)
             )
         ''')
@@ -65,7 +366,7 @@ class PatientDatabase:
                 triglycerides REAL,
                 creatinine REAL,
                 bun REAL,
-                test_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                test_date INTEGER DEFAULT (unixepoch()),
                 FOREIGN KEY (patient_id) REFERENCES patients (patient_id)
             )
         ''')
@@ -81,7 +382,7 @@ class PatientDatabase:
                 family_history TEXT,
                 surgeries TEXT,
                 lifestyle_factors TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at INTEGER DEFAULT (unixepoch()),
                 FOREIGN KEY (patient_id) REFERENCES patients (patient_id)
             )
         ''')
@@ -92,34 +393,145 @@ class PatientDatabase:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 patient_id TEXT NOT NULL,
                 symptoms TEXT,
-                recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                recorded_at INTEGER DEFAULT (unixepoch()),
                 FOREIGN KEY (patient_id) REFERENCES patients (patient_id)
             )
         ''')
+    
+    def _migrate_gender_to_integer(self, cursor: sqlite3.Cursor):
+        """Rebuild a patients table created with TEXT genders to store integer codes"""
+        cursor.execute('PRAGMA table_info(patients)')
+        column_types = {row['name']: row['type'] for row in cursor.fetchall()}
+        if column_types.get('gender') != 'TEXT':
+            return
+        
+        # TEXT affinity would turn codes back into strings, so the table is
+        # copied into a new one; rowids are kept and the search index, dropped
+        # here, is rebuilt by _create_search_index
+        cursor.execute('DROP TRIGGER IF EXISTS patients_fts_insert')
+        cursor.execute('DROP TRIGGER IF EXISTS patients_fts_delete')
+        cursor.execute('DROP TRIGGER IF EXISTS patients_fts_update')
+        cursor.execute('DROP TABLE IF EXISTS patients_fts')
+        cursor.execute('''
+            CREATE TABLE patients_migrated (
+                patient_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                age INTEGER NOT NULL,
+                gender INTEGER NOT NULL,
+                created_at INTEGER DEFAULT (unixepoch()),
+                updated_at INTEGER DEFAULT (unixepoch())
+            )
+        ''')
+        gender_case = ' '.join(f"WHEN '{gender.value}' THEN {code}" for gender, code in _GENDER_CODES.items())
+        cursor.execute(f'''
+            INSERT INTO patients_migrated (rowid, patient_id, name, age, gender, created_at, updated_at)
+            SELECT rowid, patient_id, name, age, CASE gender {gender_case} END, created_at, updated_at
+            FROM patients
+        ''')
+        cursor.execute('DROP TABLE patients')
+        cursor.execute('ALTER TABLE patients_migrated RENAME TO patients')
+    
+    def _migrate_timestamps_to_epoch(self, cursor: sqlite3.Cursor):
+        """Convert ISO text timestamps left by older versions to Unix epochs"""
+        cursor.execute('PRAGMA user_version')
+        if cursor.fetchone()[0] >= SCHEMA_VERSION:
+            return
+        
+        # CURRENT_TIMESTAMP defaults were UTC; lab test dates came from naive
+        # local datetimes. The old TIMESTAMP columns have NUMERIC affinity, so
+        # they hold the integers as-is
+        for table, column, modifier in (('patients', 'created_at', ''), ('patients', 'updated_at', ''),
+                                        ('vitals', 'recorded_at', ''), ('lab_results', 'test_date', ", 'utc'"),
+                                        ('medical_history', 'updated_at', ''), ('symptoms', 'recorded_at', '')):
+            cursor.execute(f"UPDATE {table} SET {column} = unixepoch({column}{modifier}) "
+                           f"WHERE typeof({column}) = 'text'")
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    
+    def _create_indexes(self, cursor: sqlite3.Cursor):
+        """Create indexes serving the name lookup and latest-record-per-patient queries"""
+        cursor.execute('DROP INDEX IF EXISTS idx_patients_name_lc')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_patients_name_nocase ON patients (name COLLATE NOCASE)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_vitals_pid_recorded ON vitals (patient_id, recorded_at DESC, id DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_lab_results_pid_test_date ON lab_results (patient_id, test_date DESC, id DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_medical_history_pid_updated ON medical_history (patient_id, updated_at DESC, id DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_symptoms_pid_recorded ON symptoms (patient_id, recorded_at DESC, id DESC)')
+    
+    def _create_search_index(self, cursor: sqlite3.Cursor):
+        """Create the full-text index over patient IDs and names, kept in sync by triggers"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patients_fts'")
+        if cursor.fetchone():
+            return
+        
+        # Trigram tokens give case-insensitive substring matches, like the LIKE '%q%' scan
+        cursor.execute('''
+            CREATE VIRTUAL TABLE patients_fts USING fts5(
+                patient_id, name,
+                content='patients', content_rowid='rowid', tokenize='trigram'
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS patients_fts_insert AFTER INSERT ON patients BEGIN
+                INSERT INTO patients_fts (rowid, patient_id, name)
+                VALUES (new.rowid, new.patient_id, new.name);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS patients_fts_delete AFTER DELETE ON patients BEGIN
+                INSERT INTO patients_fts (patients_fts, rowid, patient_id, name)
+                VALUES ('delete', old.rowid, old.patient_id, old.name);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS patients_fts_update AFTER UPDATE ON patients BEGIN
+                INSERT INTO patients_fts (patients_fts, rowid, patient_id, name)
+                VALUES ('delete', old.rowid, old.patient_id, old.name);
+                INSERT INTO patients_fts (rowid, patient_id, name)
+                VALUES (new.rowid, new.patient_id, new.name);
+            END
+        ''')
         
-        conn.commit()
-        conn.close()
+        # Index patients already stored in an existing database
+        cursor.execute("INSERT INTO patients_fts (patients_fts) VALUES ('rebuild')")
     
     def add_patient(self, patient: Patient) -> bool:
         """Add a new patient to the database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._transaction() as cursor:
+                self._insert_patients(cursor, [patient])
+            self._invalidate_cache()
+            return True
+            
+        except Exception:
+            logger.exception("Error adding patient")
+            return False
+    
+    def add_patients(self, patients: List[Patient]) -> bool:
+        """Add several patients in a single transaction"""
+        try:
+            with self._transaction() as cursor:
+                self._insert_patients(cursor, patients)
+            self._invalidate_cache()
+            return True
             
-            # Insert patient basic info
-            cursor.execute('''
-                INSERT OR REPLACE INTO patients (patient_id, name, age, gender)
-                VALUES (?, ?, ?, ?)
-            ''', (patient.patient_id, patient.name, patient.age, patient.gender.value))
+        except Exception:
+            logger.exception("Error adding patients")
+            return False
+    
+    def _insert_patients(self, cursor: sqlite3.Cursor, patients: List[Patient]):
+        """Insert patients' rows with one executemany per table, leaving the commit to the caller"""
+        patient_rows = []
+        vitals_rows = []
+        lab_rows = []
+        history_rows = []
+        symptoms_rows = []
+        
+        for patient in patients:
+            # Patient basic info
+            patient_rows.append((patient.patient_id, patient.name, patient.age, _GENDER_CODES[patient.gender]))
             
-            # Insert vitals
+            # Vitals
             if patient.vitals:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO vitals 
-                    (patient_id, systolic_bp, diastolic_bp, heart_rate, temperature, 
-                     respiratory_rate, oxygen_saturation, weight, height)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                vitals_rows.append((
                     patient.patient_id,
                     patient.vitals.systolic_bp,
                     patient.vitals.diastolic_bp,
@@ -131,14 +543,9 @@ class PatientDatabase:
                     patient.vitals.height
                 ))
             
-            # Insert lab results
+            # Lab results
             if patient.lab_results:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO lab_results 
-                    (patient_id, fasting_glucose, hba1c, total_cholesterol, 
-                     ldl_cholesterol, hdl_cholesterol, triglycerides, creatinine, bun, test_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                lab_rows.append((
                     patient.patient_id,
                     patient.lab_results.fasting_glucose,
                     patient.lab_results.hba1c,
@@ -148,241 +555,262 @@ class PatientDatabase:
                     patient.lab_results.triglycerides,
                     patient.lab_results.creatinine,
                     patient.lab_results.bun,
-                    patient.lab_results.test_date
+                    int(patient.lab_results.test_date.timestamp()) if patient.lab_results.test_date else None
                 ))
             
-            # Insert medical history
+            # Medical history
             if patient.medical_history:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO medical_history 
-                    (patient_id, conditions, medications, allergies, family_history, surgeries, lifestyle_factors)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    patient.patient_id,
-                    json.dumps(patient.medical_history.conditions),
-                    json.dumps(patient.medical_history.medications),
-                    json.dumps(patient.medical_history.allergies),
-                    json.dumps(patient.medical_history.family_history),
-                    json.dumps(patient.medical_history.surgeries),
-                    json.dumps(patient.medical_history.lifestyle_factors)
-                ))
+                history_rows.append((patient.patient_id, *map(_to_json, _HISTORY_FIELDS(patient.medical_history))))
             
-            # Insert symptoms
+            # Symptoms
             if patient.symptoms:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO symptoms (patient_id, symptoms)
-                    VALUES (?, ?)
-                ''', (patient.patient_id, json.dumps(patient.symptoms)))
-            
-            conn.commit()
-            conn.close()
-            return True
-            
-        except Exception as e:
-            print(f"Error adding patient: {e}")
-            return False
+                symptoms_rows.append((patient.patient_id, _to_json(patient.symptoms)))
+        
+        cursor.executemany(_SQL_INSERT_PATIENT, patient_rows)
+        cursor.executemany(_SQL_INSERT_VITALS, vitals_rows)
+        cursor.executemany(_SQL_INSERT_LAB_RESULTS, lab_rows)
+        cursor.executemany(_SQL_INSERT_MEDICAL_HISTORY, history_rows)
+        cursor.executemany(_SQL_INSERT_SYMPTOMS, symptoms_rows)
+    
+    def _invalidate_cache(self):
+        """Drop cached patients after a write"""
+        self._get_patient_row_cached.cache_clear()
+        self._get_patient_id_cached.cache_clear()
+    
+    def _invalidate_if_changed(self):
+        """Drop cached patients if another connection or process has committed since the last check
+        
+        The check runs on a pooled read connection, so cached reads never wait for
+        the writer. A connection's data_version changes on every commit made through
+        any other connection, this object's writer included, so each reader sees
+        every commit; one it hasn't checked before clears the cache to be safe.
+        """
+        with self._read_connection() as conn:
+            version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if self._data_versions.get(conn) != version:
+                self._data_versions[conn] = version
+                self._invalidate_cache()
     
     def get_patient_by_id(self, patient_id: str) -> Optional[Patient]:
-        """Retrieve a patient by ID"""
+        """Retrieve a patient by ID, reading from the in-memory row cache when possible"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            self._invalidate_if_changed()
+            row = self._get_patient_row_cached(patient_id)
             
-            # Get patient basic info
-            cursor.execute('SELECT * FROM patients WHERE patient_id = ?', (patient_id,))
-            patient_row = cursor.fetchone()
-            
-            if not patient_row:
-                conn.close()
-                return None
-            
-            # Get vitals
-            cursor.execute('SELECT * FROM vitals WHERE patient_id = ? ORDER BY recorded_at DESC LIMIT 1', (patient_id,))
-            vitals_row = cursor.fetchone()
-            
-            # Get lab results
-            cursor.execute('SELECT * FROM lab_results WHERE patient_id = ? ORDER BY test_date DESC LIMIT 1', (patient_id,))
-            lab_row = cursor.fetchone()
-            
-            # Get medical history
-            cursor.execute('SELECT * FROM medical_history WHERE patient_id = ? ORDER BY updated_at DESC LIMIT 1', (patient_id,))
-            history_row = cursor.fetchone()
-            
-            # Get symptoms
-            cursor.execute('SELECT * FROM symptoms WHERE patient_id = ? ORDER BY recorded_at DESC LIMIT 1', (patient_id,))
-            symptoms_row = cursor.fetchone()
-            
-            conn.close()
-            
-            # Construct Patient object
-            return self._construct_patient(patient_row, vitals_row, lab_row, history_row, symptoms_row)
-            
-        except Exception as e:
-            print(f"Error retrieving patient: {e}")
+        except _PatientNotFound:
             return None
+        except Exception:
+            logger.exception("Error retrieving patient")
+            return None
+        
+        # A fresh Patient per call, so callers can't modify each other's copy
+        return self._construct_patient(row)
+    
+    def _load_patient_row(self, patient_id: str) -> sqlite3.Row:
+        """Read a patient and their latest records from the database
+        
+        Raises _PatientNotFound rather than returning None, so misses are not cached.
+        """
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+        
+            # Get patient info and latest records in one round trip
+            cursor.execute(_SQL_SELECT_PATIENT_FULL, (patient_id,))
+            row = cursor.fetchone()
+        
+        if not row:
+            raise _PatientNotFound(patient_id)
+        
+        return row
     
     def get_patient_by_name(self, name: str) -> Optional[Patient]:
         """Retrieve a patient by name (case-insensitive)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get patient basic info
-            cursor.execute('SELECT * FROM patients WHERE LOWER(name) = LOWER(?)', (name,))
-            patient_row = cursor.fetchone()
-            
-            if not patient_row:
-                conn.close()
-                return None
-            
-            patient_id = patient_row[0]  # patient_id is the first column
-            conn.close()
+            self._invalidate_if_changed()
+            patient_id = self._get_patient_id_cached(name)
             
             # Use get_patient_by_id to get complete patient data
             return self.get_patient_by_id(patient_id)
             
-        except Exception as e:
-            print(f"Error retrieving patient by name: {e}")
+        except _PatientNotFound:
+            return None
+        except Exception:
+            logger.exception("Error retrieving patient by name")
             return None
     
+    def _load_patient_id(self, name: str) -> str:
+        """Look up the ID of the first patient with this name, raising _PatientNotFound if none"""
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_SELECT_PATIENT_BY_NAME, (name,))
+            patient_row = cursor.fetchone()
+        
+        if not patient_row:
+            raise _PatientNotFound(name)
+        
+        return patient_row['patient_id']
+    
     def search_patients(self, query: str) -> List[Dict[str, Any]]:
         """Search patients by ID or name"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._read_connection() as conn:
+                cursor = conn.cursor()
+                summary = self._patient_summary
             
-            cursor.execute('''
-                SELECT patient_id, name, age, gender 
-                FROM patients 
-                WHERE LOWER(patient_id) LIKE LOWER(?) OR LOWER(name) LIKE LOWER(?)
-                ORDER BY name
-            ''', (f'%{query}%', f'%{query}%'))
+                if len(query) >= FTS_MIN_QUERY_LENGTH:
+                    # Quote the query so FTS5 treats it as one literal string
+                    phrase = '"' + query.replace('"', '""') + '"'
+                    cursor.execute(_SQL_SEARCH_PATIENTS_FTS, (phrase,))
+                else:
+                    cursor.execute(_SQL_SEARCH_PATIENTS, (f'%{query}%', f'%{query}%'))
             
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'patient_id': row[0],
-                    'name': row[1],
-                    'age': row[2],
-                    'gender': row[3]
-                })
+                results = [summary(row) for row in cursor]
             
-            conn.close()
             return results
             
-        except Exception as e:
-            print(f"Error searching patients: {e}")
+        except Exception:
+            logger.exception("Error searching patients")
             return []
     
     def get_all_patients(self) -> List[Dict[str, Any]]:
         """Get list of all patients (basic info only)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._read_connection() as conn:
+                cursor = conn.cursor()
+                summary = self._patient_summary
             
-            cursor.execute('SELECT patient_id, name, age, gender FROM patients ORDER BY name')
+                cursor.execute(_SQL_SELECT_ALL_PATIENTS)
             
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'patient_id': row[0],
-                    'name': row[1],
-                    'age': row[2],
-                    'gender': row[3]
-                })
+                results = [summary(row) for row in cursor]
             
-            conn.close()
             return results
             
-        except Exception as e:
-            print(f"Error getting all patients: {e}")
+        except Exception:
+            logger.exception("Error getting all patients")
+            return []
+    
+    def _patient_summary(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Basic patient info from a search or listing row"""
+        return {
+            'patient_id': row['patient_id'],
+            'name': row['name'],
+            'age': row['age'],
+            'gender': _GENDERS_BY_CODE[row['gender']].value
+        }
+    
+    def get_patients_by_ids(self, patient_ids: List[str]) -> List[Patient]:
+        """Retrieve several patients in one query, in the order given; unknown IDs are skipped"""
+        try:
+            with self._read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(_SQL_SELECT_PATIENTS_FULL_BY_IDS, (_to_json(list(patient_ids)),))
+                rows = {row['patient_id']: row for row in cursor}
+            
+            return [self._construct_patient(rows[patient_id]) for patient_id in patient_ids
+                    if patient_id in rows]
+            
+        except Exception:
+            logger.exception("Error retrieving patients")
             return []
     
-    def _construct_patient(self, patient_row, vitals_row, lab_row, history_row, symptoms_row) -> Patient:
-        """Construct a Patient object from database rows"""
+    def get_all_patients_full(self) -> List[Patient]:
+        """Get all patients as complete Patient objects in a single query"""
+        try:
+            with self._read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(_SQL_SELECT_ALL_PATIENTS_FULL)
+                rows = cursor.fetchall()
+            
+            return [self._construct_patient(row) for row in rows]
+            
+        except Exception:
+            logger.exception("Error getting all patients")
+            return []
+    
+    def _construct_patient(self, row: sqlite3.Row) -> Patient:
+        """Construct a Patient object from a _SQL_SELECT_PATIENTS_FULL row"""
         
         # Basic patient info
-        patient_id, name, age, gender_str, created_at, updated_at = patient_row
-        gender = Gender(gender_str)
+        gender = _GENDERS_BY_CODE[row['gender']]
+        created_at = row['created_at']
         
         # Vitals
         vitals = VitalSigns()
-        if vitals_row:
+        if row['vitals_id'] is not None:
             vitals = VitalSigns(
-                systolic_bp=vitals_row[2],
-                diastolic_bp=vitals_row[3],
-                heart_rate=vitals_row[4],
-                temperature=vitals_row[5],
-                respiratory_rate=vitals_row[6],
-                oxygen_saturation=vitals_row[7],
-                weight=vitals_row[8],
-                height=vitals_row[9]
+                systolic_bp=row['systolic_bp'],
+                diastolic_bp=row['diastolic_bp'],
+                heart_rate=row['heart_rate'],
+                temperature=row['temperature'],
+                respiratory_rate=row['respiratory_rate'],
+                oxygen_saturation=row['oxygen_saturation'],
+                weight=row['weight'],
+                height=row['height']
             )
         
         # Lab results
         lab_results = LabResults()
-        if lab_row:
+        if row['lab_id'] is not None:
+            test_date = row['test_date']
             lab_results = LabResults(
-                fasting_glucose=lab_row[2],
-                hba1c=lab_row[3],
-                total_cholesterol=lab_row[4],
-                ldl_cholesterol=lab_row[5],
-                hdl_cholesterol=lab_row[6],
-                triglycerides=lab_row[7],
-                creatinine=lab_row[8],
-                bun=lab_row[9],
-                test_date=datetime.fromisoformat(lab_row[10]) if lab_row[10] else None
+                fasting_glucose=row['fasting_glucose'],
+                hba1c=row['hba1c'],
+                total_cholesterol=row['total_cholesterol'],
+                ldl_cholesterol=row['ldl_cholesterol'],
+                hdl_cholesterol=row['hdl_cholesterol'],
+                triglycerides=row['triglycerides'],
+                creatinine=row['creatinine'],
+                bun=row['bun'],
+                test_date=datetime.fromtimestamp(test_date) if test_date is not None else None
             )
         
         # Medical history
         medical_history = MedicalHistory()
-        if history_row:
+        if row['history_id'] is not None:
             medical_history = MedicalHistory(
-                conditions=json.loads(history_row[2]) if history_row[2] else [],
-                medications=json.loads(history_row[3]) if history_row[3] else [],
-                allergies=json.loads(history_row[4]) if history_row[4] else [],
-                family_history=json.loads(history_row[5]) if history_row[5] else [],
-                surgeries=json.loads(history_row[6]) if history_row[6] else [],
-                lifestyle_factors=json.loads(history_row[7]) if history_row[7] else {}
+                conditions=orjson.loads(row['conditions']) if row['conditions'] else [],
+                medications=orjson.loads(row['medications']) if row['medications'] else [],
+                allergies=orjson.loads(row['allergies']) if row['allergies'] else [],
+                family_history=orjson.loads(row['family_history']) if row['family_history'] else [],
+                surgeries=orjson.loads(row['surgeries']) if row['surgeries'] else [],
+                lifestyle_factors=orjson.loads(row['lifestyle_factors']) if row['lifestyle_factors'] else {}
             )
         
         # Symptoms
         symptoms = []
-        if symptoms_row:
-            symptoms = json.loads(symptoms_row[2]) if symptoms_row[2] else []
+        if row['symptoms_id'] is not None:
+            symptoms = orjson.loads(row['symptoms']) if row['symptoms'] else []
         
         return Patient(
-            patient_id=patient_id,
-            name=name,
-            age=age,
+            patient_id=row['patient_id'],
+            name=row['name'],
+            age=row['age'],
             gender=gender,
             vitals=vitals,
             lab_results=lab_results,
             medical_history=medical_history,
             symptoms=symptoms,
-            created_at=datetime.fromisoformat(created_at) if created_at else datetime.now()
+            created_at=datetime.fromtimestamp(created_at) if created_at is not None else datetime.now()
         )
     
     def populate_sample_data(self):
-        """Populate database with sample patients"""
-        from sample_data import create_sample_patients
-        
-        sample_patients = create_sample_patients()
+        """Populate database with sample patients in a single transaction"""
+        sample_patients = _sample_patients()
         
-        for patient in sample_patients:
-            self.add_patient(patient)
+        with self._transaction() as cursor:
+            self._insert_patients(cursor, sample_patients)
+        self._invalidate_cache()
         
         print(f"✅ Added {len(sample_patients)} sample patients to database")
     
     def get_patient_count(self) -> int:
         """Get total number of patients in database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM patients')
-            count = cursor.fetchone()[0]
-            conn.close()
+            with self._read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(_SQL_COUNT_PATIENTS)
+                count = cursor.fetchone()[0]
             return count
-        except Exception as e:
-            print(f"Error getting patient count: {e}")
+        except Exception:
+            logger.exception("Error getting patient count")
             return 0
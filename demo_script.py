@@ -62,7 +62,7 @@ def main():
         # Save detailed report
         output_file = "demo_wellness_plan.txt"
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(wellness_plan.to_formatted_report())
+            wellness_plan.write_formatted_report(f)
         print(f"\n💾 Full wellness plan saved to: {output_file}")
         
         print("\n✅ Demo completed successfully!")
@@ -3,17 +3,134 @@ AI-Powered Personalized Healthcare Assistant
 Main class for generating personalized wellness recommendations
 """
 
+import re
+import sys
+import threading
+from types import MappingProxyType
 from typing import Dict, List, Tuple, Any
 import numpy as np
+from cachetools import LRUCache
 from datetime import datetime
 
 from models import (
     Patient, ClusterProfile, PCAFeatures, WellnessPlan,
     NutritionRecommendation, LifestyleRecommendation, 
-    SupplementRecommendation, SafetyAlert, RiskLevel
+    SupplementRecommendation, SafetyAlert, RiskLevel, PatientFlags
 )
-from ml_engine import HealthMLEngine
+from ml_engine import HealthMLEngine, PatientCohort
 from config import Config
+from kernels import (
+    score_risk, ALERT_BP_CRISIS, ALERT_GLUCOSE_CRISIS,
+    REFER_CARDIOLOGIST, REFER_ENDOCRINOLOGIST, REFER_DIETITIAN
+)
+
+# Substrings that set each flag when found in a lowercased condition or medication
+# (keywords must not contain one another, since matches do not overlap)
+CONDITION_KEYWORDS = {
+    'has_diabetes': ('diabetes',),
+    'has_heart': ('heart',),
+    'has_htn': ('hypertension',)
+}
+MEDICATION_KEYWORDS = {
+    'on_blood_thinner': ('warfarin', 'blood thinner'),
+    'on_diabetes_medication': ('diabetes medication', 'metformin')
+}
+
+def _keyword_pattern(keywords: Dict[str, Tuple[str, ...]]) -> re.Pattern:
+    """One alternation over every keyword, with each group named after the flag it sets"""
+    return re.compile('|'.join(
+        f"(?P<{flag}>{'|'.join(map(re.escape, words))})" for flag, words in keywords.items()
+    ))
+
+CONDITION_PATTERN = _keyword_pattern(CONDITION_KEYWORDS)
+MEDICATION_PATTERN = _keyword_pattern(MEDICATION_KEYWORDS)
+
+def _scan_keywords(items: List[str], pattern: re.Pattern) -> Dict[str, bool]:
+    """Set a flag for every keyword group matched by any item, in one regex pass over the joined items"""
+    flags = dict.fromkeys(pattern.groupindex, False)
+    for match in pattern.finditer('\n'.join(items).lower()):
+        flags[match.lastgroup] = True
+    return flags
+
+# Fixed recommendation text; generators copy these before adding patient-specific entries
+_BASE_EMPHASIZE = (
+    "Green leafy vegetables (palak, methi, spinach)",
+    "Lentils (moong dal, masoor dal, chana dal)",
+    "Seasonal fruits (guava, papaya, apple)",
+    "Whole grains (brown rice, bajra, jowar, ragi)",
+    "Curd and buttermilk",
+    "Turmeric, ginger, garlic"
+)
+_BASE_AVOID = (
+    "Deep fried foods (samosa, pakora, puri)",
+    "Sweets and mithai",
+    "Refined flour products (maida)",
+    "Excessive salt and pickles",
+    "Processed and packaged foods"
+)
+_DIABETES_MEAL_TIPS = (
+    "Eat 5-6 small meals throughout the day",
+    "Include protein in every meal (dal, paneer, curd)",
+    "Reduce rice quantity, prefer roti (whole wheat bread)",
+    "Include bitter gourd, fenugreek leaves, and black plum in diet",
+    "Walk for 10-15 minutes after meals"
+)
+_CARDIO_MEAL_TIPS = (
+    "Drink arjuna bark decoction for heart health",
+    "Reduce salt intake - avoid pickles and papad",
+    "Include fish 2-3 times per week",
+    "Include flaxseeds and walnuts in diet",
+    "Drink coconut water regularly"
+)
+_WEIGHT_MEAL_TIPS = (
+    "Fill half your plate with vegetables",
+    "Eat slowly and chew properly",
+    "Have salad before main meal",
+    "Reduce sugar and ghee intake",
+    "Have early dinner"
+)
+_HYDRATION_GUIDELINES = "Drink 8-10 glasses of water daily, include coconut water and buttermilk in summer"
+_BASE_SLEEP = (
+    "Aim for 7-9 hours of quality sleep nightly",
+    "Maintain consistent sleep and wake times",
+    "Create a cool, dark, quiet sleeping environment",
+    "Avoid screens 1 hour before bedtime"
+)
+_BASE_STRESS = (
+    "Practice deep breathing exercises (10 minutes daily)",
+    "Consider meditation or mindfulness apps",
+    "Engage in regular physical activity",
+    "Maintain social connections and hobbies"
+)
+
+# Display names for the fitness levels, built once so every plan shares the same strings
+_FITNESS_TITLES = {level: sys.intern(level.title()) for level in ('beginner', 'intermediate', 'advanced')}
+
+# Safety alert text for each score_risk bit, in report order
+_IMMEDIATE_ACTIONS = (
+    (ALERT_BP_CRISIS, "Seek immediate medical attention for blood pressure crisis"),
+    (ALERT_GLUCOSE_CRISIS, "Seek immediate medical attention for severe hyperglycemia")
+)
+_SPECIALIST_REFERRALS = (
+    (REFER_CARDIOLOGIST, "Cardiologist for hypertension management"),
+    (REFER_ENDOCRINOLOGIST, "Endocrinologist for diabetes management"),
+    (REFER_DIETITIAN, "Registered dietitian for weight management")
+)
+
+# Distinct flag combinations whose recommendations are kept per assistant
+RECOMMENDATION_CACHE_SIZE = 4096
+
+# Risk level codes produced by score_risk
+RISK_LEVELS = (RiskLevel.LOW, RiskLevel.MODERATE, RiskLevel.HIGH, RiskLevel.CRITICAL)
+
+def _risk_inputs(cohort: PatientCohort) -> Tuple[np.ndarray, ...]:
+    """Systolic BP, fasting glucose, HbA1c and BMI columns, with missing or zero readings as NaN"""
+    return (
+        cohort.readings('systolic_bp'),
+        cohort.readings('fasting_glucose'),
+        cohort.readings('hba1c'),
+        cohort.readings('bmi')
+    )
 
 class PersonalizedHealthcareAssistant:
     """Main AI assistant for personalized healthcare recommendations"""
@@ -21,6 +138,46 @@ class PersonalizedHealthcareAssistant:
     def __init__(self, config: Config = None):
         self.config = config or Config()
         self.ml_engine = HealthMLEngine(self.config)
+        self._reset_caches()
+    
+    def __getstate__(self):
+        """Pickle the assistant without its recommendation caches or their lock"""
+        state = self.__dict__.copy()
+        del state['_recommendation_cache'], state['_safety_alert_cache'], state['_cache_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset_caches()
+    
+    def _reset_caches(self):
+        """Start empty recommendation and safety alert caches"""
+        # Recommendations depend only on the flags (and fitness level), so patients
+        # with the same profile share one frozen set of recommendation objects. The
+        # caches are held on the instance rather than wrapping bound methods, so the
+        # assistant stays picklable and is not kept alive through a reference cycle.
+        self._recommendation_cache = LRUCache(maxsize=RECOMMENDATION_CACHE_SIZE)
+        self._safety_alert_cache = LRUCache(maxsize=RECOMMENDATION_CACHE_SIZE)
+        self._cache_lock = threading.Lock()
+    
+    def _cached(self, cache: LRUCache, build, *args):
+        """Look the arguments up in one of the caches, building the value on a miss"""
+        with self._cache_lock:
+            value = cache.get(args)
+        if value is None:
+            value = build(*args)
+            with self._cache_lock:
+                cache[args] = value
+        return value
+    
+    def _recommendations_cached(self, flags: PatientFlags, fitness_level: str) -> Tuple[
+            NutritionRecommendation, LifestyleRecommendation, SupplementRecommendation]:
+        """_generate_recommendations through the recommendation cache"""
+        return self._cached(self._recommendation_cache, self._generate_recommendations, flags, fitness_level)
+    
+    def _safety_alert_cached(self, level: int, mask: int) -> SafetyAlert:
+        """_safety_alert_from_score through the safety alert cache"""
+        return self._cached(self._safety_alert_cache, self._safety_alert_from_score, level, mask)
         
     def train_model(self, training_patients: List[Patient]) -> Dict[str, Any]:
         """Train the ML model with patient data"""
@@ -32,11 +189,35 @@ class PersonalizedHealthcareAssistant:
         # Get ML analysis
         cluster_profile, pca_features = self.ml_engine.analyze_patient(patient)
         
+        # Lowercase and scan the history once for every generator
+        flags = self._precompute_flags(patient)
+        safety_alerts = self._generate_safety_alerts(patient)
+        
+        return self._assemble_plan(patient, cluster_profile, pca_features, flags, safety_alerts)
+    
+    def generate_wellness_plans(self, patients: List[Patient]) -> List[WellnessPlan]:
+        """Generate wellness plans for a cohort, running the ML analysis and risk
+        scoring over all patients at once"""
+        cohort = PatientCohort.from_patients(patients)
+        analyses = self.ml_engine.analyze_cohort(cohort)
+        levels, masks = score_risk(*_risk_inputs(cohort))
+        
+        plans = []
+        for patient, (cluster_profile, pca_features), level, mask in zip(
+                patients, analyses, levels.tolist(), masks.tolist()):
+            flags = self._precompute_flags(patient)
+            safety_alerts = self._safety_alert_cached(level, mask)
+            plans.append(self._assemble_plan(patient, cluster_profile, pca_features, flags, safety_alerts))
+        return plans
+    
+    def _assemble_plan(self, patient: Patient, cluster_profile: ClusterProfile,
+                       pca_features: PCAFeatures, flags: PatientFlags,
+                       safety_alerts: SafetyAlert) -> WellnessPlan:
+        """Generate the remaining recommendations and combine them into a plan"""
+        
         # Generate recommendations
-        nutrition = self._generate_nutrition_recommendations(patient, cluster_profile)
-        lifestyle = self._generate_lifestyle_recommendations(patient, cluster_profile)
-        supplements = self._generate_supplement_recommendations(patient, cluster_profile)
-        safety_alerts = self._generate_safety_alerts(patient, cluster_profile)
+        nutrition, lifestyle, supplements = self._recommendations_cached(
+            flags, self._fitness_level(patient, flags))
         
         # Create wellness plan
         wellness_plan = WellnessPlan(
@@ -51,163 +232,142 @@ class PersonalizedHealthcareAssistant:
         
         return wellness_plan
     
-    def _generate_nutrition_recommendations(self, patient: Patient, 
-                                          cluster_profile: ClusterProfile) -> NutritionRecommendation:
+    def _precompute_flags(self, patient: Patient) -> PatientFlags:
+        """Evaluate every threshold and keyword check the generators need, once per patient"""
+        history = patient.medical_history
+        vitals = patient.vitals
+        labs = patient.lab_results
+        sbp = vitals.systolic_bp or 0
+        bmi = vitals.bmi or 0
+        fasting_glucose = labs.fasting_glucose or 0
+        hba1c = labs.hba1c or 0
+        total_cholesterol = labs.total_cholesterol or 0
+        conditions = _scan_keywords(history.conditions, CONDITION_PATTERN)
+        return PatientFlags(
+            sbp_ge_130=sbp >= 130,
+            sbp_ge_140=sbp >= 140,
+            fg_ge_100=fasting_glucose >= 100,
+            hba1c_ge_57=hba1c >= 5.7,
+            chol_ge_200=total_cholesterol >= 200,
+            bmi_ge_25=bmi >= 25,
+            bmi_ge_30=bmi >= 30,
+            bmi_ge_35=bmi >= 35,
+            has_conditions=bool(history.conditions),
+            **conditions,
+            **_scan_keywords(history.medications, MEDICATION_PATTERN),
+            has_cardio_risk=(sbp >= 130 or total_cholesterol >= 200
+                             or conditions['has_htn'] or conditions['has_heart']),
+            needs_cardiac_clearance=conditions['has_heart'] or sbp >= 140
+        )
+    
+    def _generate_recommendations(self, flags: PatientFlags, fitness_level: str) -> Tuple[
+            NutritionRecommendation, LifestyleRecommendation, SupplementRecommendation]:
+        """Nutrition, lifestyle and supplement recommendations for one flag combination"""
+        return (self._generate_nutrition_recommendations(flags),
+                self._generate_lifestyle_recommendations(fitness_level, flags),
+                self._generate_supplement_recommendations(flags))
+    
+    @staticmethod
+    def _fitness_level(patient: Patient, flags: PatientFlags) -> str:
+        """Determine fitness level based on age, conditions, and BMI"""
+        age = patient.age
+        fitness_level = "beginner"
+        
+        if age < 40 and not flags.has_conditions and not flags.bmi_ge_30:
+            fitness_level = "intermediate"
+        
+        if age < 30 and not flags.has_conditions and not flags.bmi_ge_25:
+            fitness_level = "advanced"
+        
+        return fitness_level
+    
+    def _generate_nutrition_recommendations(self, flags: PatientFlags) -> NutritionRecommendation:
         """Generate personalized nutrition recommendations"""
         
-        foods_to_emphasize = []
-        foods_to_avoid = []
+        # Base Indian dietary recommendations for all patients
+        foods_to_emphasize = list(_BASE_EMPHASIZE)
+        foods_to_avoid = list(_BASE_AVOID)
         meal_planning_tips = []
         special_considerations = []
         
-        # Base Indian dietary recommendations for all patients
-        foods_to_emphasize.extend([
-            "Green leafy vegetables (palak, methi, spinach)",
-            "Lentils (moong dal, masoor dal, chana dal)",
-            "Seasonal fruits (guava, papaya, apple)",
-            "Whole grains (brown rice, bajra, jowar, ragi)",
-            "Curd and buttermilk",
-            "Turmeric, ginger, garlic"
-        ])
-
-        foods_to_avoid.extend([
-            "Deep fried foods (samosa, pakora, puri)",
-            "Sweets and mithai",
-            "Refined flour products (maida)",
-            "Excessive salt and pickles",
-            "Processed and packaged foods"
-        ])
-        
-        # Condition-specific recommendations
-        conditions = [c.lower() for c in patient.medical_history.conditions]
-        
         # Diabetes/Pre-diabetes recommendations
-        if (patient.lab_results.hba1c and patient.lab_results.hba1c >= 5.7) or \
-           (patient.lab_results.fasting_glucose and patient.lab_results.fasting_glucose >= 100) or \
-           any('diabetes' in c for c in conditions):
+        if flags.hba1c_ge_57 or flags.fg_ge_100 or flags.has_diabetes:
             
             foods_to_emphasize.extend(self.config.NUTRITION_DATABASE['diabetes_risk']['recommended'])
             foods_to_avoid.extend(self.config.NUTRITION_DATABASE['diabetes_risk']['avoid'])
-            meal_planning_tips.extend([
-                "Eat 5-6 small meals throughout the day",
-                "Include protein in every meal (dal, paneer, curd)",
-                "Reduce rice quantity, prefer roti (whole wheat bread)",
-                "Include bitter gourd, fenugreek leaves, and black plum in diet",
-                "Walk for 10-15 minutes after meals"
-            ])
+            meal_planning_tips.extend(_DIABETES_MEAL_TIPS)
             special_considerations.append("Monitor blood glucose levels as recommended by healthcare provider")
         
         # Cardiovascular risk recommendations
-        if (patient.vitals.systolic_bp and patient.vitals.systolic_bp >= 130) or \
-           (patient.lab_results.total_cholesterol and patient.lab_results.total_cholesterol >= 200) or \
-           any('hypertension' in c or 'heart' in c for c in conditions):
+        if flags.has_cardio_risk:
             
             foods_to_emphasize.extend(self.config.NUTRITION_DATABASE['cardiovascular_risk']['recommended'])
             foods_to_avoid.extend(self.config.NUTRITION_DATABASE['cardiovascular_risk']['avoid'])
-            meal_planning_tips.extend([
-                "Drink arjuna bark decoction for heart health",
-                "Reduce salt intake - avoid pickles and papad",
-                "Include fish 2-3 times per week",
-                "Include flaxseeds and walnuts in diet",
-                "Drink coconut water regularly"
-            ])
+            meal_planning_tips.extend(_CARDIO_MEAL_TIPS)
         
         # Hypertension-specific recommendations
-        if patient.vitals.systolic_bp and patient.vitals.systolic_bp >= 130:
+        if flags.sbp_ge_130:
             foods_to_emphasize.extend(self.config.NUTRITION_DATABASE['hypertension']['recommended'])
             foods_to_avoid.extend(self.config.NUTRITION_DATABASE['hypertension']['avoid'])
             special_considerations.append("Monitor blood pressure regularly")
         
         # Weight management recommendations (Indian context)
-        if patient.vitals.bmi and patient.vitals.bmi >= 25:
-            meal_planning_tips.extend([
-                "Fill half your plate with vegetables",
-                "Eat slowly and chew properly",
-                "Have salad before main meal",
-                "Reduce sugar and ghee intake",
-                "Have early dinner"
-            ])
+        if flags.bmi_ge_25:
+            meal_planning_tips.extend(_WEIGHT_MEAL_TIPS)
             special_considerations.append("Consult a dietitian for personalized meal planning")
         
-        # Remove duplicates and format
-        foods_to_emphasize = list(set(foods_to_emphasize))
-        foods_to_avoid = list(set(foods_to_avoid))
-        
+        # Remove duplicates, keeping first-seen order so reports are reproducible
         return NutritionRecommendation(
-            foods_to_emphasize=foods_to_emphasize,
-            foods_to_avoid=foods_to_avoid,
-            meal_planning_tips=meal_planning_tips,
-            hydration_guidelines="Drink 8-10 glasses of water daily, include coconut water and buttermilk in summer",
-            special_considerations=special_considerations
+            foods_to_emphasize=tuple(dict.fromkeys(foods_to_emphasize)),
+            foods_to_avoid=tuple(dict.fromkeys(foods_to_avoid)),
+            meal_planning_tips=tuple(meal_planning_tips),
+            hydration_guidelines=_HYDRATION_GUIDELINES,
+            special_considerations=tuple(special_considerations)
         )
     
-    def _generate_lifestyle_recommendations(self, patient: Patient, 
-                                          cluster_profile: ClusterProfile) -> LifestyleRecommendation:
+    def _generate_lifestyle_recommendations(self, fitness_level: str,
+                                          flags: PatientFlags) -> LifestyleRecommendation:
         """Generate personalized lifestyle and exercise recommendations"""
         
-        # Determine fitness level based on age, conditions, and BMI
-        fitness_level = "beginner"
-        
-        if patient.age < 40 and not patient.medical_history.conditions and \
-           (not patient.vitals.bmi or patient.vitals.bmi < 30):
-            fitness_level = "intermediate"
-        
-        if patient.age < 30 and not patient.medical_history.conditions and \
-           (not patient.vitals.bmi or patient.vitals.bmi < 25):
-            fitness_level = "advanced"
-        
         # Get base exercise guidelines
         exercise_guidelines = self.config.EXERCISE_GUIDELINES[fitness_level]
         
         # Modify based on conditions
         activity_modifications = []
-        conditions = [c.lower() for c in patient.medical_history.conditions]
         
-        if any('heart' in c for c in conditions) or \
-           (patient.vitals.systolic_bp and patient.vitals.systolic_bp >= 140):
+        if flags.needs_cardiac_clearance:
             activity_modifications.append("Avoid high-intensity exercise without medical clearance")
             activity_modifications.append("Monitor heart rate during exercise")
         
-        if any('diabetes' in c for c in conditions):
+        if flags.has_diabetes:
             activity_modifications.append("Monitor blood glucose before and after exercise")
             activity_modifications.append("Carry fast-acting carbohydrates during exercise")
         
-        if patient.vitals.bmi and patient.vitals.bmi >= 35:
+        if flags.bmi_ge_35:
             activity_modifications.append("Start with low-impact activities (swimming, walking)")
             activity_modifications.append("Gradually increase intensity as fitness improves")
         
         # Sleep recommendations
-        sleep_recommendations = [
-            "Aim for 7-9 hours of quality sleep nightly",
-            "Maintain consistent sleep and wake times",
-            "Create a cool, dark, quiet sleeping environment",
-            "Avoid screens 1 hour before bedtime"
-        ]
+        sleep_recommendations = list(_BASE_SLEEP)
         
         # Stress management
-        stress_management = [
-            "Practice deep breathing exercises (10 minutes daily)",
-            "Consider meditation or mindfulness apps",
-            "Engage in regular physical activity",
-            "Maintain social connections and hobbies"
-        ]
+        stress_management = list(_BASE_STRESS)
         
         # Add condition-specific stress management
-        if patient.vitals.systolic_bp and patient.vitals.systolic_bp >= 130:
+        if flags.sbp_ge_130:
             stress_management.append("Practice stress-reduction techniques as stress can elevate blood pressure")
         
         return LifestyleRecommendation(
             exercise_type=exercise_guidelines['aerobic'],
             exercise_frequency="Most days of the week",
             exercise_duration="30-60 minutes",
-            exercise_intensity=fitness_level.title(),
-            sleep_recommendations=sleep_recommendations,
-            stress_management=stress_management,
-            activity_modifications=activity_modifications
+            exercise_intensity=_FITNESS_TITLES[fitness_level],
+            sleep_recommendations=tuple(sleep_recommendations),
+            stress_management=tuple(stress_management),
+            activity_modifications=tuple(activity_modifications)
         )
     
-    def _generate_supplement_recommendations(self, patient: Patient, 
-                                           cluster_profile: ClusterProfile) -> SupplementRecommendation:
+    def _generate_supplement_recommendations(self, flags: PatientFlags) -> SupplementRecommendation:
         """Generate personalized supplement recommendations"""
         
         recommended_supplements = []
@@ -218,99 +378,69 @@ class PersonalizedHealthcareAssistant:
         # General wellness supplements
         recommended_supplements.extend(self.config.SUPPLEMENT_DATABASE['general_wellness'])
         
-        # Condition-specific supplements
-        conditions = [c.lower() for c in patient.medical_history.conditions]
-        
         # Diabetes prevention/management
-        if (patient.lab_results.hba1c and patient.lab_results.hba1c >= 5.7) or \
-           any('diabetes' in c for c in conditions):
+        if flags.hba1c_ge_57 or flags.has_diabetes:
             recommended_supplements.extend(self.config.SUPPLEMENT_DATABASE['diabetes_prevention'])
             monitoring_suggestions.append("Monitor blood glucose levels when starting new supplements")
         
         # Cardiovascular health
-        if (patient.vitals.systolic_bp and patient.vitals.systolic_bp >= 130) or \
-           (patient.lab_results.total_cholesterol and patient.lab_results.total_cholesterol >= 200):
+        if flags.sbp_ge_130 or flags.chol_ge_200:
             recommended_supplements.extend(self.config.SUPPLEMENT_DATABASE['cardiovascular_health'])
             monitoring_suggestions.append("Monitor blood pressure regularly")
         
         # Add contraindications based on medications
-        medications = [m.lower() for m in patient.medical_history.medications]
-        
-        if any('warfarin' in m or 'blood thinner' in m for m in medications):
+        if flags.on_blood_thinner:
             contraindications.append("Avoid high-dose omega-3 supplements without medical supervision")
             interaction_warnings.append("Omega-3 supplements may increase bleeding risk with blood thinners")
         
-        if any('diabetes medication' in m or 'metformin' in m for m in medications):
+        if flags.on_diabetes_medication:
             interaction_warnings.append("Monitor blood glucose when adding chromium or cinnamon supplements")
         
+        # Remove duplicates across condition branches by name, keeping first-seen order.
+        # Entries stay read-only since cached recommendations are shared between plans.
+        unique_supplements = {}
+        for supplement in recommended_supplements:
+            unique_supplements.setdefault(supplement['name'], MappingProxyType(dict(supplement)))
+        
         return SupplementRecommendation(
-            recommended_supplements=recommended_supplements,
-            contraindications=contraindications,
-            interaction_warnings=interaction_warnings,
-            monitoring_suggestions=monitoring_suggestions
+            recommended_supplements=tuple(unique_supplements.values()),
+            contraindications=tuple(contraindications),
+            interaction_warnings=tuple(interaction_warnings),
+            monitoring_suggestions=tuple(monitoring_suggestions)
         )
     
-    def _generate_safety_alerts(self, patient: Patient, 
-                               cluster_profile: ClusterProfile) -> SafetyAlert:
+    def _generate_safety_alerts(self, patient: Patient) -> SafetyAlert:
         """Generate safety alerts and medical referral recommendations"""
-        
-        risk_level = RiskLevel.LOW
+        vitals = patient.vitals
+        labs = patient.lab_results
+        # One-element score_risk columns, with missing or zero readings as NaN like _risk_inputs
+        sbp, fasting_glucose, hba1c, bmi = (
+            np.array([value or np.nan], dtype=np.float64)
+            for value in (vitals.systolic_bp, labs.fasting_glucose, labs.hba1c, vitals.bmi)
+        )
+        levels, masks = score_risk(sbp, fasting_glucose, hba1c, bmi)
+        return self._safety_alert_cached(int(levels[0]), int(masks[0]))
+    
+    def _safety_alert_from_score(self, level: int, mask: int) -> SafetyAlert:
+        """Build the safety alert text for a scored risk level and alert bitmask"""
+        risk_level = RISK_LEVELS[level]
         warning_signs = []
-        immediate_actions = []
-        follow_up_timeline = "Annual routine check-up"
-        specialist_referrals = []
-        
-        # Assess risk level based on vitals and lab results
-        risk_factors = 0
-        
-        # Blood pressure assessment
-        if patient.vitals.systolic_bp:
-            if patient.vitals.systolic_bp >= 180:
-                risk_level = RiskLevel.CRITICAL
-                warning_signs.extend(self.config.WARNING_SIGNS['immediate_attention'])
-                immediate_actions.append("Seek immediate medical attention for blood pressure crisis")
-            elif patient.vitals.systolic_bp >= 140:
-                risk_factors += 2
-                specialist_referrals.append("Cardiologist for hypertension management")
-            elif patient.vitals.systolic_bp >= 130:
-                risk_factors += 1
-        
-        # Glucose assessment
-        if patient.lab_results.fasting_glucose:
-            if patient.lab_results.fasting_glucose >= 400:
-                risk_level = RiskLevel.CRITICAL
-                immediate_actions.append("Seek immediate medical attention for severe hyperglycemia")
-            elif patient.lab_results.fasting_glucose >= 126:
-                risk_factors += 2
-                specialist_referrals.append("Endocrinologist for diabetes management")
-            elif patient.lab_results.fasting_glucose >= 100:
-                risk_factors += 1
-        
-        # HbA1c assessment
-        if patient.lab_results.hba1c:
-            if patient.lab_results.hba1c >= 6.5:
-                risk_factors += 2
-                if "Endocrinologist for diabetes management" not in specialist_referrals:
-                    specialist_referrals.append("Endocrinologist for diabetes management")
-            elif patient.lab_results.hba1c >= 5.7:
-                risk_factors += 1
-        
-        # BMI assessment
-        if patient.vitals.bmi:
-            if patient.vitals.bmi >= 35:
-                risk_factors += 2
-                specialist_referrals.append("Registered dietitian for weight management")
-            elif patient.vitals.bmi >= 30:
-                risk_factors += 1
-        
-        # Determine overall risk level
-        if risk_level != RiskLevel.CRITICAL:
-            if risk_factors >= 4:
-                risk_level = RiskLevel.HIGH
-                follow_up_timeline = "Within 1-2 months"
-            elif risk_factors >= 2:
-                risk_level = RiskLevel.MODERATE
-                follow_up_timeline = "Within 3-6 months"
+        
+        if mask & ALERT_BP_CRISIS:
+            warning_signs.extend(self.config.WARNING_SIGNS['immediate_attention'])
+        
+        # Each bit maps to one entry, so several rules raising the same referral
+        # still produce it once, in table order
+        immediate_actions = tuple(text for bit, text in _IMMEDIATE_ACTIONS if mask & bit)
+        specialist_referrals = tuple(text for bit, text in _SPECIALIST_REFERRALS if mask & bit)
+        
+        # Critical cases already carry immediate actions, so keep the routine timeline
+        if risk_level == RiskLevel.HIGH:
+            follow_up_timeline = "Within 1-2 months"
+        elif risk_level == RiskLevel.MODERATE:
+            follow_up_timeline = "Within 3-6 months"
+        else:
+            follow_up_timeline = "Annual routine check-up"
         
         # Add general warning signs
         if risk_level in [RiskLevel.MODERATE, RiskLevel.HIGH]:
@@ -318,7 +448,7 @@ class PersonalizedHealthcareAssistant:
         
         return SafetyAlert(
             risk_level=risk_level,
-            warning_signs=warning_signs,
+            warning_signs=tuple(warning_signs),
             immediate_actions=immediate_actions,
             follow_up_timeline=follow_up_timeline,
             specialist_referrals=specialist_referrals
@@ -0,0 +1,115 @@
+"""
+Numeric kernels for patient scoring, JIT-compiled with Numba when it is installed
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Fallback decorator: run kernels as plain NumPy code when Numba is missing"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True, fastmath=True)
+def cluster_distances(x: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Euclidean distance from one feature vector to every cluster center"""
+    return np.sqrt(((centers - x) ** 2).sum(axis=1))
+
+@njit(cache=True, fastmath=True, nogil=True)
+def score_features(x: np.ndarray, mean: np.ndarray, scale: np.ndarray, centers: np.ndarray,
+                   center_spread: np.ndarray, components: np.ndarray, pca_mean: np.ndarray):
+    """Whole per-patient scoring path: standardise, assign the nearest center, and project
+    
+    Returns the cluster id, the similarity to that cluster (1 at the center, 0 at the
+    spread of the centers) and the PCA components.
+    """
+    scaled = (x - mean) / scale
+    distances = cluster_distances(scaled, centers)
+    cluster_id = np.argmin(distances)
+    
+    similarity = 1.0
+    max_distance = center_spread[cluster_id]
+    if max_distance > 0:
+        similarity = max(0.0, 1.0 - distances[cluster_id] / max_distance)
+    
+    return cluster_id, similarity, np.dot(components, scaled - pca_mean)
+
+@njit(cache=True, fastmath=True, nogil=True)
+def score_features_batch(features: np.ndarray, mean: np.ndarray, scale: np.ndarray, centers: np.ndarray,
+                         center_spread: np.ndarray, components: np.ndarray, pca_mean: np.ndarray):
+    """score_features over every row of an (N, F) block, releasing the GIL for the whole block"""
+    n = features.shape[0]
+    cluster_ids = np.empty(n, dtype=np.int64)
+    similarities = np.empty(n, dtype=np.float64)
+    projections = np.empty((n, components.shape[0]), dtype=np.float64)
+    for i in range(n):
+        cluster_id, similarity, projected = score_features(
+            features[i], mean, scale, centers, center_spread, components, pca_mean
+        )
+        cluster_ids[i] = cluster_id
+        similarities[i] = similarity
+        projections[i] = projected
+    return cluster_ids, similarities, projections
+
+# Safety alert bits set by score_risk
+ALERT_BP_CRISIS = 1
+ALERT_GLUCOSE_CRISIS = 2
+REFER_CARDIOLOGIST = 4
+REFER_ENDOCRINOLOGIST = 8
+REFER_DIETITIAN = 16
+
+# Threshold tables for score_risk. A reading falls in band i when it is at or above
+# thresholds[i - 1] and below thresholds[i]; band 0 is below every threshold.
+# Each band carries the risk points it adds and the alert bits it sets.
+SBP_THRESHOLDS = np.array([130.0, 140.0, 180.0])
+SBP_POINTS = np.array([0, 1, 2, 0], dtype=np.int64)
+SBP_FLAGS = np.array([0, 0, REFER_CARDIOLOGIST, ALERT_BP_CRISIS], dtype=np.int64)
+
+GLUCOSE_THRESHOLDS = np.array([100.0, 126.0, 400.0])
+GLUCOSE_POINTS = np.array([0, 1, 2, 0], dtype=np.int64)
+GLUCOSE_FLAGS = np.array([0, 0, REFER_ENDOCRINOLOGIST, ALERT_GLUCOSE_CRISIS], dtype=np.int64)
+
+HBA1C_THRESHOLDS = np.array([5.7, 6.5])
+HBA1C_POINTS = np.array([0, 1, 2], dtype=np.int64)
+HBA1C_FLAGS = np.array([0, 0, REFER_ENDOCRINOLOGIST], dtype=np.int64)
+
+BMI_THRESHOLDS = np.array([30.0, 35.0])
+BMI_POINTS = np.array([0, 1, 2], dtype=np.int64)
+BMI_FLAGS = np.array([0, 0, REFER_DIETITIAN], dtype=np.int64)
+
+CRISIS_FLAGS = ALERT_BP_CRISIS | ALERT_GLUCOSE_CRISIS
+
+# No fastmath here: missing readings arrive as NaN and must land in band 0
+@njit(cache=True)
+def _bands(thresholds: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Threshold band of every reading, with missing (NaN) readings in band 0"""
+    bands = np.searchsorted(thresholds, values, side='right')
+    return np.where(np.isnan(values), 0, bands)
+
+@njit(cache=True)
+def score_risk(sbp: np.ndarray, fg: np.ndarray, hba1c: np.ndarray, bmi: np.ndarray):
+    """Safety-alert threshold ladder for N patients, as table lookups on threshold bands
+    
+    Returns a risk level code per patient (0 low, 1 moderate, 2 high, 3 critical)
+    and a bitmask of the ALERT_*/REFER_* flags above.
+    """
+    sbp_bands = _bands(SBP_THRESHOLDS, sbp)
+    fg_bands = _bands(GLUCOSE_THRESHOLDS, fg)
+    hba1c_bands = _bands(HBA1C_THRESHOLDS, hba1c)
+    bmi_bands = _bands(BMI_THRESHOLDS, bmi)
+    
+    risk_factors = (SBP_POINTS[sbp_bands] + GLUCOSE_POINTS[fg_bands]
+                    + HBA1C_POINTS[hba1c_bands] + BMI_POINTS[bmi_bands])
+    masks = (SBP_FLAGS[sbp_bands] | GLUCOSE_FLAGS[fg_bands]
+             | HBA1C_FLAGS[hba1c_bands] | BMI_FLAGS[bmi_bands])
+    
+    # A crisis reading is critical on its own; otherwise the summed points decide
+    levels = np.where((masks & CRISIS_FLAGS) != 0, 3,
+                      np.where(risk_factors >= 4, 2, np.where(risk_factors >= 2, 1, 0)))
+    return levels.astype(np.int64), masks
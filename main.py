@@ -4,8 +4,11 @@ Main application for the AI-Powered Personalized Healthcare Assistant
 
 import os
 import sys
+import csv
+import json
 from typing import List
-import pandas as pd
+from datetime import datetime
+import numpy as np
 
 from healthcare_assistant import PersonalizedHealthcareAssistant
 from sample_data import create_sample_patients, get_test_patient
@@ -50,18 +53,24 @@ def main():
         # Display results
         print("\n📋 PERSONALIZED WELLNESS PLAN")
         print("=" * 50)
-        print(wellness_plan.to_formatted_report())
+        report = wellness_plan.to_formatted_report()
+        print(report)
         
         # Save results to file
         output_file = "wellness_plan_output.txt"
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(wellness_plan.to_formatted_report())
+            f.write(report)
         print(f"\n💾 Wellness plan saved to: {output_file}")
         
     except Exception as e:
         print(f"❌ Error generating wellness plan: {e}")
         return
     
+    # Piped input: analyze the records on stdin instead of prompting
+    if not sys.stdin.isatty():
+        analyze_piped_patients(assistant, sys.stdin.read())
+        return
+    
     # Interactive mode
     print("\n🔄 Interactive Mode")
     print("=" * 30)
@@ -94,7 +103,7 @@ def analyze_custom_patient(assistant: PersonalizedHealthcareAssistant):
     
     try:
         # Get basic patient info
-        patient_id = input("Patient ID: ").strip() or f"PT-{pd.Timestamp.now().strftime('%Y%m%d%H%M%S')}"
+        patient_id = input("Patient ID: ").strip() or f"PT-{datetime.now().strftime('%Y%m%d%H%M%S')}"
         name = input("Patient Name: ").strip() or "Test Patient"
         age = int(input("Age: ").strip() or "50")
         gender_input = input("Gender (male/female/other): ").strip().lower() or "female"
@@ -117,7 +126,6 @@ def analyze_custom_patient(assistant: PersonalizedHealthcareAssistant):
         
         # Create patient object
         from models import VitalSigns, LabResults, MedicalHistory
-        from datetime import datetime
         
         patient = Patient(
             patient_id=patient_id,
@@ -152,6 +160,28 @@ def analyze_custom_patient(assistant: PersonalizedHealthcareAssistant):
     except Exception as e:
         print(f"❌ Error analyzing patient: {e}")
 
+def analyze_piped_patients(assistant: PersonalizedHealthcareAssistant, text: str):
+    """Analyze patients read in one go from piped input (a JSON object, a JSON array or JSON lines)"""
+    try:
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        if isinstance(records, dict):
+            records = [records]
+        
+        patients = [Patient.from_dict(record) for record in records]
+        print(f"\n🔄 Generating {len(patients)} wellness plan(s)...")
+        for wellness_plan in assistant.generate_wellness_plans(patients):
+            print("\n📋 WELLNESS PLAN RESULTS")
+            print("=" * 40)
+            print(wellness_plan.to_formatted_report())
+        
+    except (ValueError, TypeError) as e:
+        print(f"❌ Invalid input: {e}")
+    except Exception as e:
+        print(f"❌ Error analyzing patients: {e}")
+
 def display_cluster_info(assistant: PersonalizedHealthcareAssistant):
     """Display information about ML clusters"""
     print("\n🎯 Cluster Information")
@@ -173,24 +203,55 @@ def export_training_data(patients: List[Patient]):
     print("-" * 30)
     
     try:
-        # Convert patients to DataFrame
-        patient_data = []
-        for patient in patients:
-            data = patient.to_dict()
-            data['name'] = patient.name
-            data['conditions'] = '; '.join(patient.medical_history.conditions)
-            data['medications'] = '; '.join(patient.medical_history.medications)
-            data['family_history'] = '; '.join(patient.medical_history.family_history)
-            patient_data.append(data)
-        
-        df = pd.DataFrame(patient_data)
-        
-        # Save to CSV
+        # Build typed column arrays, one per CSV column
+        n = len(patients)
+        vitals = [patient.vitals for patient in patients]
+        labs = [patient.lab_results for patient in patients]
+        histories = [patient.medical_history for patient in patients]
+        family = [history.family_history_text for history in histories]
+        
+        def measure(records, attr):
+            # Integer readings stay integers unless the column holds a float, as pandas inferred it
+            values = [getattr(r, attr) or 0 for r in records]
+            dtype = np.int64 if all(isinstance(value, int) for value in values) else np.float64
+            return np.array(values, dtype=dtype)
+        
+        columns = {
+            'patient_id': [patient.patient_id for patient in patients],
+            'age': np.fromiter((patient.age for patient in patients), dtype=np.int16, count=n),
+            'gender': [patient.gender.value for patient in patients],
+            'bmi': measure(vitals, 'bmi'),
+            'systolic_bp': measure(vitals, 'systolic_bp'),
+            'diastolic_bp': measure(vitals, 'diastolic_bp'),
+            'heart_rate': measure(vitals, 'heart_rate'),
+            'fasting_glucose': measure(labs, 'fasting_glucose'),
+            'hba1c': measure(labs, 'hba1c'),
+            'total_cholesterol': measure(labs, 'total_cholesterol'),
+            'ldl_cholesterol': measure(labs, 'ldl_cholesterol'),
+            'hdl_cholesterol': measure(labs, 'hdl_cholesterol'),
+            'triglycerides': measure(labs, 'triglycerides'),
+            'num_conditions': np.fromiter((len(h.conditions) for h in histories), dtype=np.int32, count=n),
+            'num_medications': np.fromiter((len(h.medications) for h in histories), dtype=np.int32, count=n),
+            'family_diabetes': np.fromiter(('diabetes' in f for f in family), dtype=bool, count=n),
+            'family_heart_disease': np.fromiter(('heart' in f for f in family), dtype=bool, count=n),
+            'name': [patient.name for patient in patients],
+            'conditions': ['; '.join(h.conditions) for h in histories],
+            'medications': ['; '.join(h.medications) for h in histories],
+            'family_history': ['; '.join(h.family_history) for h in histories],
+        }
+        
+        # Save to CSV, streaming rows straight from the columns
         filename = "training_data_export.csv"
-        df.to_csv(filename, index=False)
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(columns)
+            writer.writerows(zip(*(
+                column.tolist() if isinstance(column, np.ndarray) else column
+                for column in columns.values()
+            )))
         print(f"✅ Training data exported to: {filename}")
-        print(f"   Records: {len(df)}")
-        print(f"   Columns: {len(df.columns)}")
+        print(f"   Records: {n}")
+        print(f"   Columns: {len(columns)}")
         
     except Exception as e:
         print(f"❌ Error exporting data: {e}")
@@ -3,17 +3,96 @@ Machine Learning Engine for Patient Clustering and Analysis
 """
 
 import numpy as np
-import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA, IncrementalPCA
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import silhouette_score
 from typing import Dict, List, Tuple, Any
+from operator import attrgetter
+from collections import Counter
+from itertools import chain
 import joblib
 import os
+import threading
+from cachetools import LRUCache
+from dataclasses import dataclass, replace
 
-from models import Patient, ClusterProfile, PCAFeatures
+from models import Patient, ClusterProfile, PCAFeatures, Gender
 from config import Config
+from kernels import score_features, score_features_batch
+
+# Feature layout shared by training and per-patient analysis
+NUMERICAL_FEATURES = [
+    'age', 'bmi', 'systolic_bp', 'diastolic_bp', 'heart_rate',
+    'fasting_glucose', 'hba1c', 'total_cholesterol', 'ldl_cholesterol',
+    'hdl_cholesterol', 'triglycerides', 'num_conditions', 'num_medications'
+]
+BINARY_FEATURES = ['family_diabetes', 'family_heart_disease']
+GENDER_FEATURES = ['gender_male', 'gender_female']
+FEATURE_NAMES = NUMERICAL_FEATURES + BINARY_FEATURES + GENDER_FEATURES
+FEATURE_INDEX = {name: index for index, name in enumerate(FEATURE_NAMES)}
+
+# Distinct feature vectors whose cluster and PCA scores are kept between calls
+ANALYSIS_CACHE_SIZE = 1024
+
+# Rows per batch for MiniBatchKMeans and IncrementalPCA on large training cohorts
+MINIBATCH_SIZE = 1024
+
+# Single C-level getter for the numeric patient attributes, in FEATURE_NAMES order
+_MEASUREMENT_GETTER = attrgetter(
+    'age', 'vitals.bmi', 'vitals.systolic_bp', 'vitals.diastolic_bp', 'vitals.heart_rate',
+    'lab_results.fasting_glucose', 'lab_results.hba1c', 'lab_results.total_cholesterol',
+    'lab_results.ldl_cholesterol', 'lab_results.hdl_cholesterol', 'lab_results.triglycerides'
+)
+
+def patient_to_vector(patient: Patient) -> np.ndarray:
+    """Extract the flat feature vector for a patient, with missing values as 0"""
+    history = patient.medical_history
+    family_history_str = history.family_history_text
+    values = (
+        *_MEASUREMENT_GETTER(patient),
+        len(history.conditions),
+        len(history.medications),
+        'diabetes' in family_history_str,
+        'heart' in family_history_str,
+        patient.gender is Gender.MALE,
+        patient.gender is Gender.FEMALE
+    )
+    return np.fromiter((value or 0 for value in values), dtype=np.float64, count=len(FEATURE_NAMES))
+
+def patients_to_matrix(patients: List[Patient]) -> np.ndarray:
+    """Stack patient feature vectors into one preallocated, C-contiguous (N, F) matrix"""
+    matrix = np.empty((len(patients), len(FEATURE_NAMES)), dtype=np.float64)
+    for row, patient in enumerate(patients):
+        matrix[row] = patient_to_vector(patient)
+    return matrix
+
+@dataclass(slots=True, frozen=True, eq=False)
+class PatientCohort:
+    """Column-oriented view of a batch of patients
+    
+    The patient objects are walked once to fill the (N, F) feature matrix; batch scoring
+    and risk checks then read whole feature columns.
+    """
+    patients: Tuple[Patient, ...]
+    features: np.ndarray
+    
+    @classmethod
+    def from_patients(cls, patients: List[Patient]) -> 'PatientCohort':
+        """Extract every patient's features into one matrix"""
+        return cls(tuple(patients), patients_to_matrix(patients))
+    
+    def __len__(self) -> int:
+        return len(self.patients)
+    
+    def column(self, feature: str) -> np.ndarray:
+        """One feature for every patient, missing values as 0"""
+        return self.features[:, FEATURE_INDEX[feature]]
+    
+    def readings(self, feature: str) -> np.ndarray:
+        """One feature for every patient, missing (zero) readings as NaN"""
+        column = self.column(feature)
+        return np.where(column != 0, column, np.nan)
 
 class HealthMLEngine:
     """Machine Learning engine for patient health analysis"""
@@ -22,80 +101,133 @@ class HealthMLEngine:
         self.config = config or Config()
         self.scaler = StandardScaler()
         self.kmeans = None
+        self.centroids = None
+        self.center_spread = None
+        self.center_sq_norms = None
+        self.feature_mean = None
+        self.feature_scale = None
+        self.feature_importance = {}
+        self.pca_components = None
+        self.pca_mean = None
         self.pca = None
         self.cluster_profiles = {}
         self.feature_names = []
         self.is_trained = False
-        
-    def prepare_features(self, patients: List[Patient]) -> pd.DataFrame:
-        """Convert patient data to feature matrix for ML"""
-        features = []
-        
-        for patient in patients:
-            patient_features = patient.to_dict()
-            features.append(patient_features)
-        
-        df = pd.DataFrame(features)
-        
-        # Select numerical features for ML
-        numerical_features = [
-            'age', 'bmi', 'systolic_bp', 'diastolic_bp', 'heart_rate',
-            'fasting_glucose', 'hba1c', 'total_cholesterol', 'ldl_cholesterol',
-            'hdl_cholesterol', 'triglycerides', 'num_conditions', 'num_medications'
-        ]
-        
-        # Add binary features
-        binary_features = ['family_diabetes', 'family_heart_disease']
-        
-        # Convert gender to numerical
-        df['gender_male'] = (df['gender'] == 'male').astype(int)
-        df['gender_female'] = (df['gender'] == 'female').astype(int)
-        
-        # Combine all features
-        self.feature_names = numerical_features + binary_features + ['gender_male', 'gender_female']
-        
-        # Fill missing values with median/mode
-        for feature in numerical_features:
-            if feature in df.columns:
-                df[feature] = df[feature].fillna(df[feature].median())
-        
-        for feature in binary_features:
-            if feature in df.columns:
-                df[feature] = df[feature].fillna(False).astype(int)
-        
-        return df[self.feature_names]
+        self._reset_score_cache()
+    
+    def __getstate__(self):
+        """Pickle the model without its score cache or lock"""
+        state = self.__dict__.copy()
+        del state['_score_cache'], state['_score_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset_score_cache()
+    
+    def _reset_score_cache(self):
+        """Start an empty score cache, e.g. after training or loading a model"""
+        # Held on the instance rather than wrapping a bound method, so the engine
+        # stays picklable and the cache does not keep it alive through a cycle
+        self._score_cache = LRUCache(maxsize=ANALYSIS_CACHE_SIZE)
+        self._score_lock = threading.Lock()
+        
+    def _cache_model_arrays(self):
+        """Keep the scaler statistics, contiguous cluster centers, their squared norms, each
+        center's largest distance to another center, and the PCA feature importance
+        
+        The arrays are copied so that a memory-mapped snapshot is only read here and
+        scoring works on in-memory arrays.
+        """
+        self.feature_mean = np.array(self.scaler.mean_, dtype=np.float64, order='C')
+        self.feature_scale = np.array(self.scaler.scale_, dtype=np.float64, order='C')
+        self.centroids = np.array(self.kmeans.cluster_centers_, dtype=np.float64, order='C')
+        self.center_sq_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        self.center_spread = np.linalg.norm(
+            self.centroids[:, None, :] - self.centroids[None, :, :], axis=2
+        ).max(axis=1)
+        
+        self.pca_components = np.array(self.pca.components_, dtype=np.float64, order='C')
+        self.pca_mean = np.array(self.pca.mean_, dtype=np.float64, order='C')
+        
+        # Feature importance as the summed absolute PCA component loadings
+        self.feature_importance = dict(zip(
+            self.feature_names, np.abs(self.pca.components_).sum(axis=0).tolist()
+        ))
+    
+    def _scale(self, features: np.ndarray) -> np.ndarray:
+        """StandardScaler.transform as one ufunc expression, skipping sklearn's input validation"""
+        return (features - self.feature_mean) / self.feature_scale
+    
+    def prepare_features(self, patients: List[Patient]) -> np.ndarray:
+        """Convert patient data to the (N, F) feature matrix for ML, missing values as 0"""
+        self.feature_names = list(FEATURE_NAMES)
+        return patients_to_matrix(patients)
     
     def train_clustering_model(self, patients: List[Patient]) -> Dict[str, Any]:
         """Train K-Means clustering model on patient data"""
-        # Prepare features
-        feature_df = self.prepare_features(patients)
+        # Fail before any fitting when there are too few patients to form the clusters
+        n_clusters = self.config.ML_CONFIG['n_clusters']
+        if len(patients) < n_clusters:
+            raise ValueError(f"Need at least {n_clusters} training patients, got {len(patients)}")
         
-        # Scale features
-        scaled_features = self.scaler.fit_transform(feature_df)
-        
-        # Train K-Means
-        self.kmeans = KMeans(
-            n_clusters=self.config.ML_CONFIG['n_clusters'],
-            random_state=self.config.ML_CONFIG['random_state'],
-            n_init=10
-        )
+        # Prepare features
+        features = self.prepare_features(patients)
+        
+        # Scale features; KMeans and PCA take the C-contiguous float64 rows as-is, without
+        # copying or converting them first
+        scaled_features = np.ascontiguousarray(self.scaler.fit_transform(features), dtype=np.float64)
+        
+        # Train K-Means; large cohorts fit on random mini-batches instead of full passes
+        use_minibatch = (self.config.ML_CONFIG['use_minibatch']
+                         and len(patients) > self.config.ML_CONFIG['minibatch_threshold'])
+        if use_minibatch:
+            self.kmeans = MiniBatchKMeans(
+                n_clusters=n_clusters,
+                batch_size=MINIBATCH_SIZE,
+                n_init=3,
+                reassignment_ratio=0.01,
+                random_state=self.config.ML_CONFIG['random_state']
+            )
+        else:
+            self.kmeans = KMeans(
+                n_clusters=n_clusters,
+                algorithm=self.config.ML_CONFIG['kmeans_algorithm'],
+                random_state=self.config.ML_CONFIG['random_state'],
+                n_init=self.config.ML_CONFIG['kmeans_n_init']
+            )
         
         cluster_labels = self.kmeans.fit_predict(scaled_features)
         
-        # Calculate silhouette score
-        silhouette_avg = silhouette_score(scaled_features, cluster_labels)
-        
-        # Train PCA
-        self.pca = PCA(
-            n_components=self.config.ML_CONFIG['pca_components'],
+        # Calculate silhouette score; it is quadratic in the number of patients,
+        # so large training sets use a fixed-size random sample
+        sample_size = self.config.ML_CONFIG['silhouette_sample_size']
+        silhouette_avg = silhouette_score(
+            scaled_features, cluster_labels,
+            sample_size=sample_size if len(patients) > sample_size else None,
             random_state=self.config.ML_CONFIG['random_state']
         )
         
-        pca_features = self.pca.fit_transform(scaled_features)
+        # Train PCA; only the fitted components are kept, so the projected training
+        # matrix is never built. Large cohorts fit in the same batches as MiniBatchKMeans
+        if use_minibatch:
+            self.pca = IncrementalPCA(
+                n_components=self.config.ML_CONFIG['pca_components'],
+                batch_size=MINIBATCH_SIZE
+            )
+        else:
+            self.pca = PCA(
+                n_components=self.config.ML_CONFIG['pca_components'],
+                random_state=self.config.ML_CONFIG['random_state']
+            )
+        
+        self.pca.fit(scaled_features)
         
         # Create cluster profiles
-        self._create_cluster_profiles(feature_df, cluster_labels, patients)
+        self._create_cluster_profiles(features, cluster_labels, patients)
         
+        self._cache_model_arrays()
+        self._reset_score_cache()
         self.is_trained = True
         
         return {
@@ -105,9 +237,8 @@ class HealthMLEngine:
             'n_samples': len(patients)
         }
     
-    def _create_cluster_profiles(self, feature_df: pd.DataFrame, 
-                                cluster_labels: np.ndarray, 
-                                patients: List[Patient]):
+    def _create_cluster_profiles(self, features: np.ndarray, cluster_labels: np.ndarray,
+                                 patients: List[Patient]):
         """Create detailed profiles for each cluster"""
         
         cluster_names = [
@@ -118,10 +249,41 @@ class HealthMLEngine:
             "Complex Comorbidities"
         ]
         
-        for cluster_id in range(self.config.ML_CONFIG['n_clusters']):
-            cluster_mask = cluster_labels == cluster_id
-            cluster_patients = [p for i, p in enumerate(patients) if cluster_mask[i]]
-            cluster_features = feature_df[cluster_mask]
+        # Lower bounds of the configured risk bands
+        threshold = self.config.threshold
+        obese_bmi = threshold('bmi', 'obese')[0]
+        overweight_bmi = threshold('bmi', 'overweight')[0]
+        hypertensive_systolic = threshold('blood_pressure', 'stage2', 'systolic')[0]
+        elevated_systolic = threshold('blood_pressure', 'stage1', 'systolic')[0]
+        diabetic_glucose = threshold('glucose', 'diabetic')[0]
+        prediabetic_glucose = threshold('glucose', 'prediabetic')[0]
+        
+        n_clusters = self.config.ML_CONFIG['n_clusters']
+        
+        # Per-cluster means of every summarised reading in one pass; missing readings
+        # are stored as 0 and left out of the means (age is always averaged)
+        sizes = np.bincount(cluster_labels, minlength=n_clusters)
+        def cluster_means(feature, skip_missing=True):
+            column = features[:, FEATURE_NAMES.index(feature)]
+            present = column != 0 if skip_missing else np.ones(len(column), dtype=bool)
+            counts = np.bincount(cluster_labels, weights=present, minlength=n_clusters)
+            totals = np.bincount(cluster_labels, weights=np.where(present, column, 0), minlength=n_clusters)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return (totals / counts).tolist(), counts.tolist()
+        
+        avg_ages, _ = cluster_means('age', skip_missing=False)
+        avg_bmis, bmi_counts = cluster_means('bmi')
+        avg_systolics, systolic_counts = cluster_means('systolic_bp')
+        avg_glucoses, glucose_counts = cluster_means('fasting_glucose')
+        avg_hba1cs, hba1c_counts = cluster_means('hba1c')
+        
+        # Patients grouped by cluster, keeping their original order within each group
+        order = np.argsort(cluster_labels, kind='stable')
+        bounds = np.cumsum(sizes).tolist()
+        
+        for cluster_id in range(n_clusters):
+            cluster_size = int(sizes[cluster_id])
+            members = order[bounds[cluster_id] - cluster_size:bounds[cluster_id]].tolist()
             
             # Calculate cluster characteristics
             characteristics = []
@@ -129,62 +291,47 @@ class HealthMLEngine:
             risk_factors = []
             
             # Analyze age distribution
-            ages = [p.age for p in cluster_patients]
-            avg_age = np.mean(ages)
-            characteristics.append(f"Average age: {avg_age:.1f} years")
+            characteristics.append(f"Average age: {avg_ages[cluster_id]:.1f} years")
             
             # Analyze BMI
-            bmis = [p.vitals.bmi for p in cluster_patients if p.vitals.bmi]
-            if bmis:
-                avg_bmi = np.mean(bmis)
+            if bmi_counts[cluster_id]:
+                avg_bmi = avg_bmis[cluster_id]
                 characteristics.append(f"Average BMI: {avg_bmi:.1f}")
-                if avg_bmi >= 30:
+                if avg_bmi >= obese_bmi:
                     risk_factors.append("Obesity")
-                elif avg_bmi >= 25:
+                elif avg_bmi >= overweight_bmi:
                     risk_factors.append("Overweight")
             
             # Analyze blood pressure
-            bp_systolic = [p.vitals.systolic_bp for p in cluster_patients if p.vitals.systolic_bp]
-            if bp_systolic:
-                avg_systolic = np.mean(bp_systolic)
+            if systolic_counts[cluster_id]:
+                avg_systolic = avg_systolics[cluster_id]
                 characteristics.append(f"Average systolic BP: {avg_systolic:.0f} mmHg")
-                if avg_systolic >= 140:
+                if avg_systolic >= hypertensive_systolic:
                     risk_factors.append("Hypertension")
-                elif avg_systolic >= 130:
+                elif avg_systolic >= elevated_systolic:
                     risk_factors.append("Elevated blood pressure")
             
             # Analyze glucose/diabetes markers
-            glucose_levels = [p.lab_results.fasting_glucose for p in cluster_patients 
-                            if p.lab_results.fasting_glucose]
-            hba1c_levels = [p.lab_results.hba1c for p in cluster_patients 
-                          if p.lab_results.hba1c]
-            
-            if glucose_levels:
-                avg_glucose = np.mean(glucose_levels)
+            if glucose_counts[cluster_id]:
+                avg_glucose = avg_glucoses[cluster_id]
                 characteristics.append(f"Average fasting glucose: {avg_glucose:.0f} mg/dL")
-                if avg_glucose >= 126:
+                if avg_glucose >= diabetic_glucose:
                     typical_conditions.append("Type 2 Diabetes")
-                elif avg_glucose >= 100:
+                elif avg_glucose >= prediabetic_glucose:
                     risk_factors.append("Pre-diabetes")
             
-            if hba1c_levels:
-                avg_hba1c = np.mean(hba1c_levels)
-                characteristics.append(f"Average HbA1c: {avg_hba1c:.1f}%")
+            if hba1c_counts[cluster_id]:
+                characteristics.append(f"Average HbA1c: {avg_hba1cs[cluster_id]:.1f}%")
             
             # Analyze common conditions
-            all_conditions = []
-            for patient in cluster_patients:
-                all_conditions.extend(patient.medical_history.conditions)
-            
-            condition_counts = {}
-            for condition in all_conditions:
-                condition_counts[condition] = condition_counts.get(condition, 0) + 1
+            condition_counts = Counter(chain.from_iterable(
+                patients[i].medical_history.conditions for i in members
+            ))
             
             # Get most common conditions (appearing in >30% of cluster)
-            cluster_size = len(cluster_patients)
-            for condition, count in condition_counts.items():
-                if count / cluster_size > 0.3:
-                    typical_conditions.append(condition)
+            typical_conditions.extend(
+                condition for condition, count in condition_counts.items() if count / cluster_size > 0.3
+            )
             
             # Store cluster profile
             self.cluster_profiles[cluster_id] = ClusterProfile(
@@ -203,66 +350,134 @@ class HealthMLEngine:
         if not self.is_trained:
             raise ValueError("Model must be trained before analyzing patients")
         
-        # Prepare patient features
-        patient_df = pd.DataFrame([patient.to_dict()])
-        
-        # Ensure all required features are present
-        for feature in self.feature_names:
-            if feature not in patient_df.columns:
-                if feature in ['gender_male', 'gender_female']:
-                    patient_df[feature] = 0
-                elif feature in ['family_diabetes', 'family_heart_disease']:
-                    patient_df[feature] = 0
-                else:
-                    patient_df[feature] = 0
-        
-        # Convert gender
-        patient_df['gender_male'] = (patient_df['gender'] == 'male').astype(int)
-        patient_df['gender_female'] = (patient_df['gender'] == 'female').astype(int)
-        
-        # Convert family history
-        family_history_str = ' '.join(patient.medical_history.family_history).lower()
-        patient_df['family_diabetes'] = int('diabetes' in family_history_str)
-        patient_df['family_heart_disease'] = int('heart' in family_history_str)
-        
-        # Select and scale features
-        feature_vector = patient_df[self.feature_names].fillna(0)
-        scaled_features = self.scaler.transform(feature_vector)
-        
-        # Predict cluster
-        cluster_id = self.kmeans.predict(scaled_features)[0]
-        
-        # Calculate similarity score (distance to cluster center)
-        cluster_center = self.kmeans.cluster_centers_[cluster_id]
-        distance = np.linalg.norm(scaled_features[0] - cluster_center)
-        max_distance = np.max([np.linalg.norm(center - cluster_center) 
-                              for center in self.kmeans.cluster_centers_])
-        similarity_score = max(0, 1 - (distance / max_distance)) if max_distance > 0 else 1.0
-        
-        # Calculate PCA features
-        pca_features = self.pca.transform(scaled_features)[0]
-        
-        # Get feature importance (PCA component loadings)
-        feature_importance = {}
-        for i, feature_name in enumerate(self.feature_names):
-            importance = np.sum(np.abs(self.pca.components_[:, i]))
-            feature_importance[feature_name] = importance
-        
-        # Create cluster profile for this patient
-        cluster_profile = self.cluster_profiles[cluster_id]
-        cluster_profile.similarity_score = similarity_score
-        cluster_profile.confidence_level = similarity_score * 0.9  # Slightly lower than similarity
-        
-        # Create PCA features
-        pca_result = PCAFeatures(
+        # Identical feature vectors score identically, so repeat analyses hit the cache
+        cluster_id, similarity_score, pca_features = self._score_cached(patient_to_vector(patient).tobytes())
+        
+        return (self._patient_cluster_profile(cluster_id, similarity_score),
+                self._pca_result(pca_features, self._feature_importance()))
+    
+    def _score_cached(self, features: bytes) -> Tuple[int, float, np.ndarray]:
+        """_score_features through the per-engine LRU cache"""
+        with self._score_lock:
+            result = self._score_cache.get(features)
+        if result is None:
+            result = self._score_features(features)
+            with self._score_lock:
+                self._score_cache[features] = result
+        return result
+    
+    def _score_features(self, features: bytes) -> Tuple[int, float, np.ndarray]:
+        """Cluster assignment, similarity and PCA projection for one raw feature vector"""
+        cluster_id, similarity_score, pca_features = score_features(
+            np.frombuffer(features, dtype=np.float64), self.feature_mean, self.feature_scale,
+            self.centroids, self.center_spread, self.pca_components, self.pca_mean
+        )
+        
+        # Read-only since the cache hands the same array out again
+        pca_features.flags.writeable = False
+        
+        return int(cluster_id), float(similarity_score), pca_features
+    
+    def score_patients(self, patients: List[Patient]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Cluster ids (N,), similarity scores (N,) and PCA projections (N, C) for a batch of patients"""
+        return self.score_cohort(PatientCohort.from_patients(patients))
+    
+    def score_cohort(self, cohort: PatientCohort) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """score_patients for an already extracted cohort
+        
+        One scaler, distance and PCA pass over the whole feature matrix.
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before analyzing patients")
+        
+        # Scale features, one row per patient
+        scaled_features = self._scale(cohort.features)
+        
+        # (N, K) distances to every cluster center via ||x||^2 + ||c||^2 - 2 x.c, so the
+        # bulk of the work is one matrix product; the nearest center is the assignment
+        sq_distances = (np.einsum('ij,ij->i', scaled_features, scaled_features)[:, None]
+                        + self.center_sq_norms[None, :]
+                        - 2.0 * (scaled_features @ self.centroids.T))
+        distances = np.sqrt(np.maximum(sq_distances, 0.0))
+        cluster_ids = np.argmin(distances, axis=1)
+        
+        # Largest center-to-center distance per cluster, the similarity normaliser
+        max_distance = self.center_spread[cluster_ids]
+        distance = np.take_along_axis(distances, cluster_ids[:, None], axis=1)[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity_scores = np.where(max_distance > 0, np.maximum(0, 1 - distance / max_distance), 1.0)
+        
+        return cluster_ids, similarity_scores, self.pca.transform(scaled_features)
+    
+    def analyze_patients(self, patients: List[Patient]) -> List[Tuple[ClusterProfile, PCAFeatures]]:
+        """Analyze a batch of patients, one (ClusterProfile, PCAFeatures) pair per patient"""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before analyzing patients")
+        return self.analyze_cohort(PatientCohort.from_patients(patients))
+    
+    def analyze_cohort(self, cohort: PatientCohort) -> List[Tuple[ClusterProfile, PCAFeatures]]:
+        """analyze_patients for an already extracted cohort"""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before analyzing patients")
+        if not len(cohort):
+            return []
+        
+        return self._analysis_results(*self.score_cohort(cohort))
+    
+    def analyze_patients_parallel(self, patients: List[Patient],
+                                  n_jobs: int = -1) -> List[Tuple[ClusterProfile, PCAFeatures]]:
+        """analyze_patients with the compiled scoring kernel run over blocks of patients in threads
+        
+        The kernel releases the GIL, so every thread reads the same feature matrix and
+        model arrays without copying them; without Numba the blocks run one at a time.
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before analyzing patients")
+        if not patients:
+            return []
+        
+        features = patients_to_matrix(patients)
+        n_blocks = min(len(patients), joblib.effective_n_jobs(n_jobs))
+        model_arrays = (self.feature_mean, self.feature_scale, self.centroids, self.center_spread,
+                        self.pca_components, self.pca_mean)
+        blocks = joblib.Parallel(n_jobs=n_jobs, prefer='threads')(
+            joblib.delayed(score_features_batch)(block, *model_arrays)
+            for block in np.array_split(features, n_blocks)
+        )
+        cluster_ids, similarity_scores, pca_features = (np.concatenate(parts) for parts in zip(*blocks))
+        return self._analysis_results(cluster_ids, similarity_scores, pca_features)
+    
+    def _analysis_results(self, cluster_ids: np.ndarray, similarity_scores: np.ndarray,
+                          pca_features: np.ndarray) -> List[Tuple[ClusterProfile, PCAFeatures]]:
+        """Wrap batch scores in one (ClusterProfile, PCAFeatures) pair per patient"""
+        return [
+            (self._patient_cluster_profile(cluster_id, similarity_score),
+             self._pca_result(pca_row, self._feature_importance()))
+            for cluster_id, similarity_score, pca_row
+            in zip(cluster_ids.tolist(), similarity_scores.tolist(), pca_features)
+        ]
+    
+    def _feature_importance(self) -> Dict[str, float]:
+        """Each plan's own copy of the feature importance cached with the model"""
+        return dict(self.feature_importance)
+    
+    def _patient_cluster_profile(self, cluster_id: int, similarity_score: float) -> ClusterProfile:
+        """Copy of a cluster's profile carrying one patient's scores, leaving the shared profile untouched"""
+        return replace(
+            self.cluster_profiles[cluster_id],
+            similarity_score=similarity_score,
+            confidence_level=similarity_score * 0.9  # Slightly lower than similarity
+        )
+    
+    def _pca_result(self, pca_features: np.ndarray, feature_importance: Dict[str, float]) -> PCAFeatures:
+        """Wrap one patient's projected components"""
+        return PCAFeatures(
             component_1=pca_features[0],
             component_2=pca_features[1],
             component_3=pca_features[2] if len(pca_features) > 2 else 0.0,
             explained_variance=self.pca.explained_variance_ratio_.tolist(),
             feature_importance=feature_importance
         )
-        
-        return cluster_profile, pca_result
     
     def save_model(self, filepath: str):
         """Save trained model to disk"""
@@ -278,14 +493,15 @@ class HealthMLEngine:
             'config': self.config
         }
         
-        joblib.dump(model_data, filepath)
+        # Uncompressed, so load_model can memory-map the arrays instead of unpickling them
+        joblib.dump(model_data, filepath, compress=0, protocol=5)
     
     def load_model(self, filepath: str):
         """Load trained model from disk"""
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"Model file not found: {filepath}")
         
-        model_data = joblib.load(filepath)
+        model_data = joblib.load(filepath, mmap_mode='r')
         
         self.scaler = model_data['scaler']
         self.kmeans = model_data['kmeans']
@@ -293,4 +509,6 @@ class HealthMLEngine:
         self.cluster_profiles = model_data['cluster_profiles']
         self.feature_names = model_data['feature_names']
         self.config = model_data.get('config', Config())
+        self._cache_model_arrays()
+        self._reset_score_cache()
         self.is_trained = True
@@ -2,10 +2,11 @@
 Data models for the AI-Powered Personalized Healthcare Assistant
 """
 
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple, Any
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from enum import Enum
+from itertools import count
 import json
 
 class Gender(Enum):
@@ -19,7 +20,7 @@ class RiskLevel(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
-@dataclass
+@dataclass(slots=True)
 class VitalSigns:
     """Patient vital signs data"""
     systolic_bp: Optional[int] = None
@@ -39,7 +40,7 @@ class VitalSigns:
             return round(self.weight / (height_m ** 2), 1)
         return None
 
-@dataclass
+@dataclass(slots=True)
 class LabResults:
     """Laboratory test results"""
     fasting_glucose: Optional[float] = None
@@ -52,7 +53,7 @@ class LabResults:
     bun: Optional[float] = None
     test_date: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class MedicalHistory:
     """Patient medical history"""
     conditions: List[str] = field(default_factory=list)
@@ -61,8 +62,23 @@ class MedicalHistory:
     family_history: List[str] = field(default_factory=list)
     surgeries: List[str] = field(default_factory=list)
     lifestyle_factors: Dict[str, Any] = field(default_factory=dict)
+    _family_history_text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def family_history_text(self) -> str:
+        """Family history joined and lowercased for keyword checks, built on first use"""
+        if self._family_history_text is None:
+            self._family_history_text = ' '.join(self.family_history).lower()
+        return self._family_history_text
+
+# (field, cast) pairs used to parse flat records, following the dataclass annotations
+_VITAL_TYPES = tuple((f.name, int if f.type == Optional[int] else float) for f in fields(VitalSigns))
+_LAB_TYPES = tuple((f.name, float) for f in fields(LabResults) if f.name != 'test_date')
 
-@dataclass
+# Keeps default IDs distinct when several records are parsed within the same second
+_DEFAULT_ID_SEQUENCE = count(1)
+
+@dataclass(slots=True)
 class Patient:
     """Complete patient profile"""
     patient_id: str
@@ -74,9 +90,22 @@ class Patient:
     medical_history: MedicalHistory
     symptoms: List[str] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.now)
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert patient data to dictionary for ML processing"""
+        """Convert patient data to dictionary for ML processing
+        
+        The record is built on first use and reused afterwards, so vitals, labs and
+        history are treated as fixed once a patient has been converted. Each call
+        returns a fresh copy that callers may modify.
+        """
+        if self._cached_dict is None:
+            self._cached_dict = self._build_dict()
+        return dict(self._cached_dict)
+    
+    def _build_dict(self) -> Dict[str, Any]:
+        """Flat feature record behind to_dict"""
+        family_history_text = self.medical_history.family_history_text
         return {
             'patient_id': self.patient_id,
             'age': self.age,
@@ -93,11 +122,66 @@ class Patient:
             'triglycerides': self.lab_results.triglycerides or 0,
             'num_conditions': len(self.medical_history.conditions),
             'num_medications': len(self.medical_history.medications),
-            'family_diabetes': 'diabetes' in ' '.join(self.medical_history.family_history).lower(),
-            'family_heart_disease': 'heart' in ' '.join(self.medical_history.family_history).lower(),
+            'family_diabetes': 'diabetes' in family_history_text,
+            'family_heart_disease': 'heart' in family_history_text,
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Patient':
+        """Build a patient from a flat record (e.g. one parsed JSON object), filling in defaults"""
+        def measurements(table):
+            values = {}
+            for key, cast in table:
+                value = data.get(key)
+                if value is not None and value != '':
+                    values[key] = cast(value)
+            return values
+        
+        def history(key):
+            value = data.get(key) or []
+            if isinstance(value, str):
+                value = value.split(',')
+            return [item.strip() for item in value if item.strip()]
+        
+        return cls(
+            patient_id=data.get('patient_id') or
+                f"PT-{datetime.now().strftime('%Y%m%d%H%M%S')}-{next(_DEFAULT_ID_SEQUENCE)}",
+            name=data.get('name') or 'Anonymous Patient',
+            age=int(data.get('age') or 50),
+            gender=Gender._value2member_map_.get(str(data.get('gender') or 'female').lower(), Gender.OTHER),
+            vitals=VitalSigns(**measurements(_VITAL_TYPES)),
+            lab_results=LabResults(**measurements(_LAB_TYPES), test_date=datetime.now()),
+            medical_history=MedicalHistory(
+                conditions=history('conditions'),
+                medications=history('medications'),
+                family_history=history('family_history')
+            ),
+            symptoms=history('symptoms')
+        )
+
+@dataclass(slots=True, frozen=True)
+class PatientFlags:
+    """Threshold and keyword checks shared by the recommendation generators"""
+    sbp_ge_130: bool
+    sbp_ge_140: bool
+    fg_ge_100: bool
+    hba1c_ge_57: bool
+    chol_ge_200: bool
+    bmi_ge_25: bool
+    bmi_ge_30: bool
+    bmi_ge_35: bool
+    has_conditions: bool
+    has_diabetes: bool
+    has_heart: bool
+    has_htn: bool
+    on_blood_thinner: bool
+    on_diabetes_medication: bool
+    # Derived: any cardiovascular reading or condition (BP >= 130, cholesterol >= 200, heart disease, hypertension)
+    has_cardio_risk: bool
+    # Derived: heart disease or stage 2 BP (>= 140), where intense exercise needs medical clearance
+    needs_cardiac_clearance: bool
 
-@dataclass
+@dataclass(slots=True)
 class ClusterProfile:
     """ML cluster analysis results"""
     cluster_id: int
@@ -108,7 +192,7 @@ class ClusterProfile:
     similarity_score: float
     confidence_level: float
 
-@dataclass
+@dataclass(slots=True)
 class PCAFeatures:
     """Principal Component Analysis results"""
     component_1: float  # Primary health pattern
@@ -117,44 +201,44 @@ class PCAFeatures:
     explained_variance: List[float]
     feature_importance: Dict[str, float]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NutritionRecommendation:
     """Nutritional guidance"""
-    foods_to_emphasize: List[str]
-    foods_to_avoid: List[str]
-    meal_planning_tips: List[str]
+    foods_to_emphasize: Tuple[str, ...]
+    foods_to_avoid: Tuple[str, ...]
+    meal_planning_tips: Tuple[str, ...]
     hydration_guidelines: str
-    special_considerations: List[str]
+    special_considerations: Tuple[str, ...]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LifestyleRecommendation:
     """Lifestyle and exercise guidance"""
     exercise_type: str
     exercise_frequency: str
     exercise_duration: str
     exercise_intensity: str
-    sleep_recommendations: List[str]
-    stress_management: List[str]
-    activity_modifications: List[str]
+    sleep_recommendations: Tuple[str, ...]
+    stress_management: Tuple[str, ...]
+    activity_modifications: Tuple[str, ...]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SupplementRecommendation:
     """Supplement and wellness guidance"""
-    recommended_supplements: List[Dict[str, str]]
-    contraindications: List[str]
-    interaction_warnings: List[str]
-    monitoring_suggestions: List[str]
+    recommended_supplements: Tuple[Mapping[str, str], ...]
+    contraindications: Tuple[str, ...]
+    interaction_warnings: Tuple[str, ...]
+    monitoring_suggestions: Tuple[str, ...]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SafetyAlert:
     """Safety warnings and medical referrals"""
     risk_level: RiskLevel
-    warning_signs: List[str]
-    immediate_actions: List[str]
+    warning_signs: Tuple[str, ...]
+    immediate_actions: Tuple[str, ...]
     follow_up_timeline: str
-    specialist_referrals: List[str]
+    specialist_referrals: Tuple[str, ...]
 
-@dataclass
+@dataclass(slots=True)
 class WellnessPlan:
     """Complete personalized wellness plan"""
     patient: Patient
@@ -166,25 +250,27 @@ class WellnessPlan:
     safety_alerts: SafetyAlert
     generated_at: datetime = field(default_factory=datetime.now)
     
-    def to_formatted_report(self) -> str:
-        """Generate formatted wellness plan report"""
-        report = f"""
-**Personalized Wellness Plan for {self.patient.name} (ID: {self.patient.patient_id})**
+    def iter_report_sections(self) -> Iterator[str]:
+        """Yield the formatted wellness plan report section by section"""
+        yield f"""**Personalized Wellness Plan for {self.patient.name} (ID: {self.patient.patient_id})**
 
-**Cluster Analysis Summary:**
+"""
+        yield f"""**Cluster Analysis Summary:**
 - Cluster ID: {self.cluster_profile.cluster_id} ({self.cluster_profile.cluster_name})
 - Similarity Score: {self.cluster_profile.similarity_score:.2%}
 - Confidence Level: {self.cluster_profile.confidence_level:.2%}
 - Key Characteristics: {', '.join(self.cluster_profile.characteristics)}
 
-**Current Health Assessment:**
+"""
+        yield f"""**Current Health Assessment:**
 - Age: {self.patient.age}, Gender: {self.patient.gender.value.title()}
 - BMI: {self.patient.vitals.bmi or 'N/A'}
 - Blood Pressure: {self.patient.vitals.systolic_bp or 'N/A'}/{self.patient.vitals.diastolic_bp or 'N/A'} mmHg
 - HbA1c: {self.patient.lab_results.hba1c or 'N/A'}%
 - Primary Conditions: {', '.join(self.patient.medical_history.conditions) or 'None reported'}
 
-**Nutritional Recommendations:**
+"""
+        yield f"""**Nutritional Recommendations:**
 Foods to Emphasize:
 {chr(10).join(f'- {food}' for food in self.nutrition.foods_to_emphasize)}
 
@@ -194,27 +280,48 @@ Foods to Limit/Avoid:
 Meal Planning: {', '.join(self.nutrition.meal_planning_tips)}
 Hydration: {self.nutrition.hydration_guidelines}
 
-**Lifestyle & Activity Guidelines:**
+"""
+        yield f"""**Lifestyle & Activity Guidelines:**
 - Exercise: {self.lifestyle.exercise_type}, {self.lifestyle.exercise_frequency}
 - Duration: {self.lifestyle.exercise_duration}
 - Intensity: {self.lifestyle.exercise_intensity}
 - Sleep: {', '.join(self.lifestyle.sleep_recommendations)}
 - Stress Management: {', '.join(self.lifestyle.stress_management)}
 
-**Supplement Considerations:**
+"""
+        yield f"""**Supplement Considerations:**
 Recommended Supplements:
 {chr(10).join(f"- {supp['name']}: {supp['dosage']} ({supp['timing']})" for supp in self.supplements.recommended_supplements)}
 
 Contraindications: {', '.join(self.supplements.contraindications) or 'None identified'}
 
-**Important Safety Notes:**
+"""
+        yield f"""**Important Safety Notes:**
 - Risk Level: {self.safety_alerts.risk_level.value.title()}
 - Warning Signs: {', '.join(self.safety_alerts.warning_signs)}
 - Follow-up: {self.safety_alerts.follow_up_timeline}
 - Specialist Referrals: {', '.join(self.safety_alerts.specialist_referrals) or 'None at this time'}
 
-**Disclaimer:** This guidance is for informational purposes only and does not replace professional medical advice, diagnosis, or treatment. Always consult qualified healthcare providers for medical decisions.
+"""
+        yield """**Disclaimer:** This guidance is for informational purposes only and does not replace professional medical advice, diagnosis, or treatment. Always consult qualified healthcare providers for medical decisions."""
+        yield self.report_footer(self.generated_at)
+    
+    @staticmethod
+    def report_footer(generated_at: datetime) -> str:
+        """Closing report section, stamped with when the report was generated"""
+        return f"""
 
-Generated on: {self.generated_at.strftime('%Y-%m-%d %H:%M:%S')}
-        """
-        return report.strip()
+Generated on: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}"""
+    
+    def to_formatted_report(self) -> str:
+        """Generate formatted wellness plan report"""
+        return ''.join(self.iter_report_sections()).strip()
+
+    def write_formatted_report(self, fp) -> None:
+        """Write the formatted report to a text file object section by section"""
+        sections = self.iter_report_sections()
+        pending = next(sections).lstrip()
+        for section in sections:
+            fp.write(pending)
+            pending = section
+        fp.write(pending.rstrip())
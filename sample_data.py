@@ -3,11 +3,14 @@ Sample patient data for testing the AI Healthcare Assistant
 """
 
 from datetime import datetime, timedelta
+import numpy as np
 from models import Patient, VitalSigns, LabResults, MedicalHistory, Gender
 
 def create_sample_patients():
     """Create a diverse set of sample patients for testing"""
     
+    # One reference instant for every lab date
+    now = datetime.now()
     patients = []
     
     # Patient 1: Healthy young adult
@@ -31,7 +34,7 @@ def create_sample_patients():
             ldl_cholesterol=110,
             hdl_cholesterol=55,
             triglycerides=95,
-            test_date=datetime.now() - timedelta(days=30)
+            test_date=now - timedelta(days=30)
         ),
         medical_history=MedicalHistory(
             conditions=[],
@@ -63,7 +66,7 @@ def create_sample_patients():
             ldl_cholesterol=165,
             hdl_cholesterol=38,
             triglycerides=220,
-            test_date=datetime.now() - timedelta(days=15)
+            test_date=now - timedelta(days=15)
         ),
         medical_history=MedicalHistory(
             conditions=["Pre-diabetes", "Stage 1 Hypertension"],
@@ -96,7 +99,7 @@ def create_sample_patients():
             hdl_cholesterol=32,
             triglycerides=350,
             creatinine=1.4,
-            test_date=datetime.now() - timedelta(days=7)
+            test_date=now - timedelta(days=7)
         ),
         medical_history=MedicalHistory(
             conditions=["Type 2 Diabetes", "Hypertension", "Diabetic nephropathy"],
@@ -128,7 +131,7 @@ def create_sample_patients():
             ldl_cholesterol=145,
             hdl_cholesterol=35,
             triglycerides=180,
-            test_date=datetime.now() - timedelta(days=20)
+            test_date=now - timedelta(days=20)
         ),
         medical_history=MedicalHistory(
             conditions=["Metabolic syndrome", "PCOS"],
@@ -161,7 +164,7 @@ def create_sample_patients():
             hdl_cholesterol=45,
             triglycerides=150,
             creatinine=1.2,
-            test_date=datetime.now() - timedelta(days=10)
+            test_date=now - timedelta(days=10)
         ),
         medical_history=MedicalHistory(
             conditions=["Type 2 Diabetes", "Hypertension", "Osteoporosis", "Mild cognitive impairment"],
@@ -193,7 +196,7 @@ def create_sample_patients():
             ldl_cholesterol=95,
             hdl_cholesterol=65,
             triglycerides=75,
-            test_date=datetime.now() - timedelta(days=45)
+            test_date=now - timedelta(days=45)
         ),
         medical_history=MedicalHistory(
             conditions=[],
@@ -225,7 +228,7 @@ def create_sample_patients():
             ldl_cholesterol=175,
             hdl_cholesterol=42,
             triglycerides=195,
-            test_date=datetime.now() - timedelta(days=25)
+            test_date=now - timedelta(days=25)
         ),
         medical_history=MedicalHistory(
             conditions=["Hypertension", "Hyperlipidemia"],
@@ -257,7 +260,7 @@ def create_sample_patients():
             ldl_cholesterol=125,
             hdl_cholesterol=48,
             triglycerides=110,
-            test_date=datetime.now() - timedelta(days=35)
+            test_date=now - timedelta(days=35)
         ),
         medical_history=MedicalHistory(
             conditions=[],
@@ -271,6 +274,57 @@ def create_sample_patients():
     
     return patients
 
+def create_synthetic_patients(n: int, seed: int = 42):
+    """Generate n random patients for bulk testing, drawing every field in one vectorized pass"""
+    rng = np.random.default_rng(seed)
+    
+    ages = rng.integers(25, 80, n)
+    genders = rng.choice([Gender.MALE, Gender.FEMALE], n)
+    systolic = rng.normal(125, 15, n).clip(90, 200).round()
+    diastolic = rng.normal(80, 10, n).clip(55, 130).round()
+    heart_rate = rng.normal(74, 10, n).clip(50, 120).round()
+    weight = rng.normal(72, 14, n).clip(40, 160).round(1)
+    height = rng.normal(165, 10, n).clip(140, 200).round(1)
+    glucose = rng.normal(100, 20, n).clip(65, 400).round()
+    hba1c = rng.normal(5.6, 0.7, n).clip(4.2, 12).round(1)
+    cholesterol = rng.normal(195, 35, n).clip(120, 350).round()
+    ldl = (cholesterol * rng.uniform(0.5, 0.7, n)).round()
+    hdl = rng.normal(50, 12, n).clip(25, 100).round()
+    triglycerides = rng.normal(150, 50, n).clip(50, 500).round()
+    test_dates = datetime.now() - np.arange(n) % 90 * timedelta(days=1)
+    
+    # Conditions follow the readings
+    diabetic = hba1c >= 6.5
+    prediabetic = ~diabetic & (hba1c >= 5.7)
+    hypertensive = systolic >= 140
+    
+    # Hand plain Python values to the models
+    columns = zip(
+        ages.tolist(), genders.tolist(), systolic.astype(int).tolist(), diastolic.astype(int).tolist(),
+        heart_rate.astype(int).tolist(), weight.tolist(), height.tolist(), glucose.tolist(),
+        hba1c.tolist(), cholesterol.tolist(), ldl.tolist(), hdl.tolist(), triglycerides.tolist(),
+        test_dates.tolist(), diabetic.tolist(), prediabetic.tolist(), hypertensive.tolist()
+    )
+    return [
+        Patient(
+            patient_id=f"PT-SYN-{i:06d}",
+            name=f"Synthetic Patient {i}",
+            age=age,
+            gender=gender,
+            vitals=VitalSigns(systolic_bp=sbp, diastolic_bp=dbp, heart_rate=hr, weight=wt, height=ht),
+            lab_results=LabResults(
+                fasting_glucose=fg, hba1c=a1c, total_cholesterol=chol,
+                ldl_cholesterol=ldl_c, hdl_cholesterol=hdl_c, triglycerides=tg, test_date=test_date
+            ),
+            medical_history=MedicalHistory(
+                conditions=(["Type 2 Diabetes"] if is_diabetic else ["Pre-diabetes"] if is_prediabetic else [])
+                           + (["Hypertension"] if is_hypertensive else [])
+            )
+        )
+        for i, (age, gender, sbp, dbp, hr, wt, ht, fg, a1c, chol, ldl_c, hdl_c, tg,
+                test_date, is_diabetic, is_prediabetic, is_hypertensive) in enumerate(columns)
+    ]
+
 def get_test_patient():
     """Get a specific test patient for demonstrations"""
     return Patient(
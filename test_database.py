@@ -3,9 +3,132 @@
 Test script for the patient database functionality
 """
 
-from database import PatientDatabase
+import dataclasses
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from database import PatientDatabase, SCHEMA_VERSION
+from models import Gender
 from sample_data import create_sample_patients
 
+# Schema written by the first release, before integer genders, epoch timestamps and the search index
+LEGACY_SCHEMA = '''
+    CREATE TABLE patients (
+        patient_id TEXT PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL, gender TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE vitals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id TEXT NOT NULL,
+        systolic_bp INTEGER, diastolic_bp INTEGER, heart_rate INTEGER, temperature REAL,
+        respiratory_rate INTEGER, oxygen_saturation REAL, weight REAL, height REAL,
+        recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE lab_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id TEXT NOT NULL,
+        fasting_glucose REAL, hba1c REAL, total_cholesterol REAL, ldl_cholesterol REAL,
+        hdl_cholesterol REAL, triglycerides REAL, creatinine REAL, bun REAL,
+        test_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE medical_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id TEXT NOT NULL,
+        conditions TEXT, medications TEXT, allergies TEXT, family_history TEXT,
+        surgeries TEXT, lifestyle_factors TEXT, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE symptoms (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id TEXT NOT NULL,
+        symptoms TEXT, recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO patients VALUES ('PT-LEGACY', 'Legacy Patient', 61, 'female',
+                                 '2024-01-02 03:04:05', '2024-01-02 03:04:05');
+    INSERT INTO vitals (patient_id, systolic_bp, diastolic_bp, weight, height, recorded_at)
+    VALUES ('PT-LEGACY', 135, 85, 70.0, 160.0, '2024-01-02 03:04:05');
+    INSERT INTO lab_results (patient_id, hba1c, test_date)
+    VALUES ('PT-LEGACY', 6.0, '2024-01-02 08:00:00');
+    INSERT INTO medical_history VALUES (NULL, 'PT-LEGACY', '["Hypertension"]', '[]', '[]', '[]', '[]', '{}',
+                                        '2024-01-02 03:04:05');
+'''
+
+@pytest.fixture
+def db(tmp_path):
+    """A database file holding the sample patients"""
+    database = PatientDatabase(str(tmp_path / "patients.db"))
+    assert database.add_patients(create_sample_patients())
+    yield database
+    database.close()
+
+def test_migrates_legacy_database(tmp_path):
+    """Test a database from the first release is upgraded in place"""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+    
+    database = PatientDatabase(path)
+    patient = database.get_patient_by_id("PT-LEGACY")
+    
+    assert patient.gender == Gender.FEMALE
+    assert patient.vitals.systolic_bp == 135
+    assert patient.medical_history.conditions == ["Hypertension"]
+    # Record timestamps were UTC text, lab test dates local time
+    assert patient.created_at == datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert patient.lab_results.test_date == datetime(2024, 1, 2, 8, 0, 0)
+    assert [row['patient_id'] for row in database.search_patients("legacy")] == ["PT-LEGACY"]
+    database.close()
+    
+    conn = sqlite3.connect(path)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute('SELECT typeof(gender), typeof(created_at) FROM patients').fetchone() == ('integer', 'integer')
+    conn.close()
+
+# Queries of FTS_MIN_QUERY_LENGTH characters or more go through the trigram index,
+# shorter ones through the LIKE scan
+@pytest.mark.parametrize("query", ["Johnson", "pt-2024-000", "ohn", "no such patient", "an", "K", ""])
+def test_search_matches_substring_scan(db, query):
+    """Test trigram search and the short-query LIKE fallback both return case-insensitive substring matches"""
+    expected = sorted(
+        (patient for patient in create_sample_patients()
+         if query.lower() in patient.patient_id.lower() or query.lower() in patient.name.lower()),
+        key=lambda patient: patient.name
+    )
+    results = db.search_patients(query)
+    
+    assert [row['patient_id'] for row in results] == [patient.patient_id for patient in expected]
+
+def test_cache_sees_writes_from_another_connection(db):
+    """Test cached patients are refreshed after another connection commits"""
+    patient = db.get_patient_by_id("PT-2024-0002")
+    assert db.get_patient_by_name(patient.name).age == patient.age
+    
+    other = PatientDatabase(db.db_path)
+    assert other.add_patient(dataclasses.replace(patient, age=patient.age + 1))
+    other.close()
+    
+    assert db.get_patient_by_id("PT-2024-0002").age == patient.age + 1
+    assert db.get_patient_by_name(patient.name).age == patient.age + 1
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires os.fork")
+def test_reads_after_fork(db):
+    """Test a forked child reads and writes through its own connections"""
+    patient = db.get_patient_by_id("PT-2024-0002")
+    
+    pid = os.fork()
+    if pid == 0:
+        # Child: never return into pytest
+        status = 1
+        try:
+            child_patient = db.get_patient_by_id("PT-2024-0002")
+            if child_patient.name == patient.name and db.add_patient(dataclasses.replace(patient, age=99)):
+                status = 0
+        finally:
+            os._exit(status)
+    
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert db.get_patient_by_id("PT-2024-0002").age == 99
+
 def main():
     print("🗄️ Testing Patient Database Functionality")
     print("=" * 50)
@@ -18,8 +141,9 @@ def main():
     print("📋 Adding sample patients...")
     sample_patients = create_sample_patients()
     
+    # One transaction for the whole batch; it either adds every patient or none
+    success = db.add_patients(sample_patients)
     for patient in sample_patients:
-        success = db.add_patient(patient)
         if success:
             print(f"✅ Added: {patient.name} ({patient.patient_id})")
         else:
@@ -2,21 +2,86 @@
 Test suite for the AI-Powered Personalized Healthcare Assistant
 """
 
+import pickle
 import pytest
-import numpy as np
 from datetime import datetime
 
-from healthcare_assistant import PersonalizedHealthcareAssistant
 from sample_data import create_sample_patients, get_test_patient
 from models import Patient, VitalSigns, LabResults, MedicalHistory, Gender, RiskLevel
 from config import Config
 
+# Headings every formatted wellness plan report must contain
+REPORT_REQUIRED_SECTIONS = (
+    "Personalized Wellness Plan",
+    "Cluster Analysis Summary",
+    "Current Health Assessment",
+    "Nutritional Recommendations",
+    "Lifestyle & Activity Guidelines",
+    "Supplement Considerations",
+    "Important Safety Notes",
+    "Disclaimer",
+)
+
+# High-risk patient: hypertensive crisis, uncontrolled diabetes and heart disease
+HIGH_RISK_PATIENT = Patient(
+    patient_id="PT-HIGH-RISK",
+    name="High Risk Patient",
+    age=65,
+    gender=Gender.MALE,
+    vitals=VitalSigns(
+        systolic_bp=185,  # Very high BP
+        diastolic_bp=110,
+        weight=100,
+        height=170
+    ),
+    lab_results=LabResults(
+        fasting_glucose=200,  # Diabetic range
+        hba1c=9.5,  # Poor control
+        total_cholesterol=300,
+        test_date=datetime.now()
+    ),
+    medical_history=MedicalHistory(
+        conditions=["Type 2 Diabetes", "Hypertension", "Heart disease"],
+        medications=["Insulin", "Multiple BP medications"],
+        family_history=["Heart attack", "Stroke"]
+    )
+)
+
+# Healthy patient: every reading in the normal range
+HEALTHY_PATIENT = Patient(
+    patient_id="PT-HEALTHY",
+    name="Healthy Patient",
+    age=25,
+    gender=Gender.FEMALE,
+    vitals=VitalSigns(
+        systolic_bp=110,
+        diastolic_bp=70,
+        weight=60,
+        height=165
+    ),
+    lab_results=LabResults(
+        fasting_glucose=85,
+        hba1c=5.0,
+        total_cholesterol=160,
+        hdl_cholesterol=60,
+        test_date=datetime.now()
+    ),
+    medical_history=MedicalHistory(
+        conditions=[],
+        medications=[],
+        family_history=[]
+    )
+)
+
 class TestHealthcareAssistant:
     """Test cases for the healthcare assistant"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def assistant(self):
-        """Create a healthcare assistant instance for testing"""
+        """Create a healthcare assistant instance for testing, trained once per module"""
+        # Imported here so test collection does not load scikit-learn
+        from healthcare_assistant import PersonalizedHealthcareAssistant
+        
         config = Config()
         assistant = PersonalizedHealthcareAssistant(config)
         
@@ -24,15 +89,20 @@ class TestHealthcareAssistant:
         training_patients = create_sample_patients()
         assistant.train_model(training_patients)
         
+        # Warm up the JIT-compiled scoring kernels outside the tests
+        assistant.generate_wellness_plan(get_test_patient())
+        
         return assistant
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def test_patient(self):
         """Create a test patient"""
         return get_test_patient()
     
     def test_model_training(self):
         """Test ML model training"""
+        from healthcare_assistant import PersonalizedHealthcareAssistant
+        
         assistant = PersonalizedHealthcareAssistant()
         training_patients = create_sample_patients()
         
@@ -76,11 +146,11 @@ class TestHealthcareAssistant:
         assert nutrition.hydration_guidelines is not None
         
         # Check for diabetes-specific recommendations (test patient is pre-diabetic)
-        foods_str = ' '.join(nutrition.foods_to_emphasize).lower()
-        assert any(food in foods_str for food in ['vegetable', 'protein', 'whole grain'])
+        emphasize_keywords = ('vegetable', 'protein', 'whole grain')
+        assert any(keyword in food.lower() for food in nutrition.foods_to_emphasize for keyword in emphasize_keywords)
         
-        avoid_str = ' '.join(nutrition.foods_to_avoid).lower()
-        assert any(food in avoid_str for food in ['sugar', 'processed', 'refined'])
+        avoid_keywords = ('sugar', 'processed', 'refined')
+        assert any(keyword in food.lower() for food in nutrition.foods_to_avoid for keyword in avoid_keywords)
     
     def test_lifestyle_recommendations(self, assistant, test_patient):
         """Test lifestyle recommendation generation"""
@@ -108,6 +178,10 @@ class TestHealthcareAssistant:
             assert 'name' in supplement
             assert 'dosage' in supplement
             assert 'timing' in supplement
+        
+        # Recommendations are shared between plans, so entries must be read-only
+        with pytest.raises(TypeError):
+            supplements.recommended_supplements[0]['dosage'] = "changed"
     
     def test_safety_alerts(self, assistant, test_patient):
         """Test safety alert generation"""
@@ -121,37 +195,18 @@ class TestHealthcareAssistant:
         # For pre-diabetic patient, should have moderate risk
         assert safety.risk_level in [RiskLevel.MODERATE, RiskLevel.HIGH]
     
+    @pytest.mark.parametrize("patient,expected_levels", [
+        (HIGH_RISK_PATIENT, {RiskLevel.HIGH, RiskLevel.CRITICAL}),
+        (HEALTHY_PATIENT, {RiskLevel.LOW}),
+    ], ids=["high_risk", "healthy"])
+    def test_risk_level(self, assistant, patient, expected_levels):
+        """Test risk level assignment at both ends of the risk range"""
+        wellness_plan = assistant.generate_wellness_plan(patient)
+        assert wellness_plan.safety_alerts.risk_level in expected_levels
+    
     def test_high_risk_patient(self, assistant):
         """Test analysis of high-risk patient"""
-        # Create high-risk patient
-        high_risk_patient = Patient(
-            patient_id="PT-HIGH-RISK",
-            name="High Risk Patient",
-            age=65,
-            gender=Gender.MALE,
-            vitals=VitalSigns(
-                systolic_bp=185,  # Very high BP
-                diastolic_bp=110,
-                weight=100,
-                height=170
-            ),
-            lab_results=LabResults(
-                fasting_glucose=200,  # Diabetic range
-                hba1c=9.5,  # Poor control
-                total_cholesterol=300,
-                test_date=datetime.now()
-            ),
-            medical_history=MedicalHistory(
-                conditions=["Type 2 Diabetes", "Hypertension", "Heart disease"],
-                medications=["Insulin", "Multiple BP medications"],
-                family_history=["Heart attack", "Stroke"]
-            )
-        )
-        
-        wellness_plan = assistant.generate_wellness_plan(high_risk_patient)
-        
-        # Should be high or critical risk
-        assert wellness_plan.safety_alerts.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]
+        wellness_plan = assistant.generate_wellness_plan(HIGH_RISK_PATIENT)
         
         # Should have specialist referrals
         assert len(wellness_plan.safety_alerts.specialist_referrals) > 0
@@ -161,36 +216,7 @@ class TestHealthcareAssistant:
     
     def test_healthy_patient(self, assistant):
         """Test analysis of healthy patient"""
-        # Create healthy patient
-        healthy_patient = Patient(
-            patient_id="PT-HEALTHY",
-            name="Healthy Patient",
-            age=25,
-            gender=Gender.FEMALE,
-            vitals=VitalSigns(
-                systolic_bp=110,
-                diastolic_bp=70,
-                weight=60,
-                height=165
-            ),
-            lab_results=LabResults(
-                fasting_glucose=85,
-                hba1c=5.0,
-                total_cholesterol=160,
-                hdl_cholesterol=60,
-                test_date=datetime.now()
-            ),
-            medical_history=MedicalHistory(
-                conditions=[],
-                medications=[],
-                family_history=[]
-            )
-        )
-        
-        wellness_plan = assistant.generate_wellness_plan(healthy_patient)
-        
-        # Should be low risk
-        assert wellness_plan.safety_alerts.risk_level == RiskLevel.LOW
+        wellness_plan = assistant.generate_wellness_plan(HEALTHY_PATIENT)
         
         # Should have general wellness recommendations
         assert len(wellness_plan.nutrition.foods_to_emphasize) > 0
@@ -202,19 +228,72 @@ class TestHealthcareAssistant:
         report = wellness_plan.to_formatted_report()
         
         # Check that report contains key sections
-        assert "Personalized Wellness Plan" in report
-        assert "Cluster Analysis Summary" in report
-        assert "Current Health Assessment" in report
-        assert "Nutritional Recommendations" in report
-        assert "Lifestyle & Activity Guidelines" in report
-        assert "Supplement Considerations" in report
-        assert "Important Safety Notes" in report
-        assert "Disclaimer" in report
+        missing = [section for section in REPORT_REQUIRED_SECTIONS if section not in report]
+        assert not missing, missing
         
         # Check patient information is included
         assert test_patient.name in report
         assert test_patient.patient_id in report
 
+    def test_batch_plans_match_single(self, assistant):
+        """Test batch plan generation matches per-patient generation"""
+        patients = create_sample_patients()
+        batch_plans = assistant.generate_wellness_plans(patients)
+
+        assert len(batch_plans) == len(patients)
+        for patient, batch_plan in zip(patients, batch_plans):
+            single_plan = assistant.generate_wellness_plan(patient)
+            assert batch_plan.cluster_profile.cluster_id == single_plan.cluster_profile.cluster_id
+            assert batch_plan.cluster_profile.similarity_score == pytest.approx(single_plan.cluster_profile.similarity_score)
+            assert batch_plan.safety_alerts == single_plan.safety_alerts
+            assert batch_plan.lifestyle == single_plan.lifestyle
+            assert batch_plan.supplements == single_plan.supplements
+
+    def test_engine_pickles(self, assistant, test_patient):
+        """Test a trained ML engine survives a pickle round trip"""
+        engine = pickle.loads(pickle.dumps(assistant.ml_engine))
+        cluster_profile, pca_features = engine.analyze_patient(test_patient)
+        expected_profile, expected_features = assistant.ml_engine.analyze_patient(test_patient)
+
+        assert engine.is_trained
+        assert cluster_profile.cluster_id == expected_profile.cluster_id
+        assert cluster_profile.similarity_score == pytest.approx(expected_profile.similarity_score)
+        assert pca_features.component_1 == pytest.approx(expected_features.component_1)
+
+    def test_assistant_pickles(self, assistant, test_patient):
+        """Test a trained assistant survives a pickle round trip and plans identically"""
+        restored = pickle.loads(pickle.dumps(assistant))
+        plan = restored.generate_wellness_plan(test_patient)
+        expected = assistant.generate_wellness_plan(test_patient)
+
+        assert plan.cluster_profile.cluster_id == expected.cluster_profile.cluster_id
+        assert plan.cluster_profile.similarity_score == pytest.approx(expected.cluster_profile.similarity_score)
+        assert plan.nutrition == expected.nutrition
+        assert plan.lifestyle == expected.lifestyle
+        assert plan.supplements == expected.supplements
+        assert plan.safety_alerts == expected.safety_alerts
+
+    def test_patient_from_dict(self, assistant):
+        """Test flat records with string readings parse into typed patients"""
+        record = {
+            "name": "Piped Patient", "age": "58", "gender": "Male",
+            "systolic_bp": "142", "diastolic_bp": "91", "weight": "82.5", "height": "",
+            "fasting_glucose": "118", "hba1c": "6.1", "conditions": "Hypertension, "
+        }
+        patient = Patient.from_dict(record)
+
+        assert patient.age == 58
+        assert patient.gender == Gender.MALE
+        assert patient.vitals.systolic_bp == 142 and isinstance(patient.vitals.systolic_bp, int)
+        assert patient.vitals.weight == 82.5
+        assert patient.vitals.height is None
+        assert patient.lab_results.fasting_glucose == 118.0
+        assert patient.medical_history.conditions == ["Hypertension"]
+        assert assistant.generate_wellness_plan(patient).patient is patient
+
+        # Records without an ID must not collide with each other
+        assert Patient.from_dict(record).patient_id != patient.patient_id
+
 def run_tests():
     """Run all tests"""
     print("🧪 Running Healthcare Assistant Tests")
@@ -0,0 +1,105 @@
+"""
+Tests for the command-line helpers in main.py
+"""
+
+import dataclasses
+import json
+
+import pytest
+
+from config import Config
+from main import analyze_piped_patients, export_training_data
+from models import VitalSigns, LabResults
+from sample_data import create_sample_patients
+
+EXPORT_HEADER = (
+    "patient_id,age,gender,bmi,systolic_bp,diastolic_bp,heart_rate,fasting_glucose,hba1c,"
+    "total_cholesterol,ldl_cholesterol,hdl_cholesterol,triglycerides,num_conditions,num_medications,"
+    "family_diabetes,family_heart_disease,name,conditions,medications,family_history"
+)
+
+# First rows of the sample patients as the original pandas DataFrame.to_csv export wrote them
+PANDAS_EXPORT_HEAD = [
+    EXPORT_HEADER,
+    "PT-2024-0001,28,male,23.1,118,75,68,88,5.2,180,110,55,95,0,0,False,False,Alex Johnson,,,Hypertension (father)",
+    "PT-2024-0002,52,female,30.1,142,88,78,118,6.1,245,165,38,220,2,2,True,True,Priya Sharma,"
+    "Pre-diabetes; Stage 1 Hypertension,Telmisartan 40mg; Metformin 500mg,"
+    "Type 2 Diabetes (both parents); Heart disease (father)",
+    "PT-2024-0003,64,male,31.0,155,95,82,165,8.2,280,190,32,350,3,4,True,False,Rajesh Kumar,"
+    "Type 2 Diabetes; Hypertension; Diabetic nephropathy,"
+    "Metformin 1000mg; Glimepiride 2mg; Amlodipine 5mg; Atorvastatin 20mg,"
+    "Type 2 Diabetes (mother); Stroke (father)",
+]
+
+# The same export with one float and several missing readings: pandas turned a whole
+# column to floats as soon as one value was a float, and kept the others integer
+PANDAS_MIXED_EXPORT_HEAD = [
+    EXPORT_HEADER,
+    "PT-2024-0001,28,male,0.0,120.5,0,0,0,0.0,0,0,0,0,0,0,False,False,Alex Johnson,,,Hypertension (father)",
+    "PT-2024-0002,52,female,24.7,130.0,0,0,118,6.1,245,165,38,220,2,2,True,True,Priya Sharma,"
+    "Pre-diabetes; Stage 1 Hypertension,Telmisartan 40mg; Metformin 500mg,"
+    "Type 2 Diabetes (both parents); Heart disease (father)",
+]
+
+def read_export(directory):
+    """Lines of the CSV written by export_training_data"""
+    return (directory / "training_data_export.csv").read_text(encoding='utf-8').splitlines()
+
+def test_export_matches_pandas_output(tmp_path, monkeypatch):
+    """Test the CSV export is byte-compatible with the pandas export it replaced"""
+    monkeypatch.chdir(tmp_path)
+    patients = create_sample_patients()
+    export_training_data(patients)
+    lines = read_export(tmp_path)
+
+    assert lines[:len(PANDAS_EXPORT_HEAD)] == PANDAS_EXPORT_HEAD
+    assert len(lines) == len(patients) + 1
+
+def test_export_column_types(tmp_path, monkeypatch):
+    """Test integer columns stay integer unless they hold a float, as pandas inferred"""
+    monkeypatch.chdir(tmp_path)
+    patients = create_sample_patients()
+    patients[0] = dataclasses.replace(patients[0], vitals=VitalSigns(systolic_bp=120.5), lab_results=LabResults())
+    patients[1] = dataclasses.replace(patients[1], vitals=VitalSigns(systolic_bp=130, weight=80, height=180))
+    export_training_data(patients)
+
+    assert read_export(tmp_path)[:len(PANDAS_MIXED_EXPORT_HEAD)] == PANDAS_MIXED_EXPORT_HEAD
+
+# Two flat patient records with readings as strings, the way they arrive from other tools
+PIPED_RECORDS = [
+    {"name": "Piped Patient One", "age": "58", "gender": "male", "systolic_bp": "142", "hba1c": "6.1"},
+    {"name": "Piped Patient Two", "age": 34, "gender": "female", "weight": "60", "height": "165"},
+]
+
+@pytest.fixture(scope="module")
+def assistant():
+    """A healthcare assistant trained once on the sample patients"""
+    # Imported here so test collection does not load scikit-learn
+    from healthcare_assistant import PersonalizedHealthcareAssistant
+    
+    assistant = PersonalizedHealthcareAssistant(Config())
+    assistant.train_model(create_sample_patients())
+    return assistant
+
+@pytest.mark.parametrize("text,expected_names", [
+    (json.dumps(PIPED_RECORDS[0]), ["Piped Patient One"]),
+    (json.dumps(PIPED_RECORDS), ["Piped Patient One", "Piped Patient Two"]),
+    ("\n".join(json.dumps(record) for record in PIPED_RECORDS) + "\n",
+     ["Piped Patient One", "Piped Patient Two"]),
+], ids=["object", "array", "json_lines"])
+def test_analyze_piped_patients(assistant, capsys, text, expected_names):
+    """Test piped JSON objects, arrays and JSON lines each produce one plan per record"""
+    analyze_piped_patients(assistant, text)
+    output = capsys.readouterr().out
+
+    assert "Invalid input" not in output and "Error" not in output
+    assert f"Generating {len(expected_names)} wellness plan(s)" in output
+    assert output.count("WELLNESS PLAN RESULTS") == len(expected_names)
+    for name in expected_names:
+        assert f"Personalized Wellness Plan for {name}" in output
+
+def test_analyze_piped_patients_rejects_invalid_json(assistant, capsys):
+    """Test malformed input is reported instead of raising"""
+    analyze_piped_patients(assistant, "{not json")
+
+    assert "Invalid input" in capsys.readouterr().out